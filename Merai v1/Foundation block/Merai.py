@@ -8,12 +8,17 @@ import html
 from skyfield.api import utc
 import re
 import matplotlib.pyplot as plt
-from skyfield.data import hipparcos
 from skyfield.api import Star
 import streamlit as st
 import pydeck as pdk
 from datetime import date, time
 import pandas as pd
+import os
+import sys
+
+# Share the app's star catalog (Merai v1/star_utils.py) instead of reloading Hipparcos per object
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from star_utils import get_star_catalog
 
 # Step 1: Get User Location (Working well do not touch )
 def get_user_location():
@@ -75,19 +80,18 @@ def get_visible_objects(lat, lon, user_dt=None):
                 })
         except Exception:
             continue
-    # for Bright stars (Hipparcos, mag < 2.0)
-    with load.open(hipparcos.URL) as f:
-        stars = hipparcos.load_dataframe(f)
-    bright_stars = stars[stars['magnitude'] < 2.0]
-    for hip, star_row in bright_stars.iterrows():
-        star = Star(ra_hours=star_row['ra_hours'], dec_degrees=star_row['dec_degrees'])
-        astrometric = observer.at(t).observe(star)
-        alt, az, _ = astrometric.apparent().altaz()
-        if alt.degrees > 0:
-            # Try to get a common name from 'proper', else fetch from Wikipedia description, else None
-            star_name = star_row.get('proper')
-            if isinstance(star_name, str) and star_name.strip():
-                common_name = star_name.strip()
+    # for Bright stars (Hipparcos, mag < 2.0), from the shared catalog loaded once per process
+    catalog = get_star_catalog()
+    bright = catalog.brighter_than(2.0)
+    stars = Star(ra_hours=catalog.ra_hours[bright], dec_degrees=catalog.dec_degrees[bright])
+    alts, azs, _ = observer.at(t).observe(stars).apparent().altaz()
+    for row, alt, az in zip(bright, alts.degrees, azs.degrees):
+        if alt > 0:
+            hip = int(catalog.hip[row])
+            # Common name from the catalog, else fetch from Wikipedia description, else None
+            star_name = catalog.name[row]
+            if star_name:
+                common_name = star_name
             else:
                 # Try to get name from Wikipedia description
                 desc = get_object_description(f"HIP {hip}")
@@ -103,12 +107,12 @@ def get_visible_objects(lat, lon, user_dt=None):
                 name_to_use = f"Common Name: {common_name} | Name: HIP {hip}"
             else:
                 name_to_use = f"Common Name: None | Name: HIP {hip}"
-            constellation = star_row['constellation'] if 'constellation' in star_row else ''
+            constellation = catalog.constellation[row] or ''
             visible.append({
                 'name': name_to_use,
                 'type': 'Star',
-                'altitude': round(alt.degrees, 2),
-                'azimuth': round(az.degrees, 2),
+                'altitude': round(float(alt), 2),
+                'azimuth': round(float(az), 2),
                 'raw_name': f"HIP {hip}",
                 'constellation': constellation
             })
@@ -259,14 +263,7 @@ def main():
             hip_match = re.search(r"HIP (\d+)", obj['raw_name']) if 'raw_name' in obj else None
             if hip_match:
                 hip_num = int(hip_match.group(1))
-                try:
-                    with load.open(hipparcos.URL) as f:
-                        stars = hipparcos.load_dataframe(f)
-                    star_row = stars.loc[hip_num]
-                    if 'constellation' in star_row and isinstance(star_row['constellation'], str):
-                        constellation = star_row['constellation']
-                except Exception:
-                    pass
+                constellation = get_star_catalog().constellations([hip_num])[0] or ''
         # Try to extract constellation from Wikipedia description if still missing
         if not constellation:
             desc = get_object_description(obj['name'])
@@ -337,14 +334,7 @@ def main():
             hip_match = re.search(r"HIP (\d+)", obj['raw_name']) if 'raw_name' in obj else None
             if hip_match:
                 hip_num = int(hip_match.group(1))
-                try:
-                    with load.open(hipparcos.URL) as f:
-                        stars = hipparcos.load_dataframe(f)
-                    star_row = stars.loc[hip_num]
-                    if 'constellation' in star_row and isinstance(star_row['constellation'], str):
-                        constellation = star_row['constellation']
-                except Exception:
-                    pass
+                constellation = get_star_catalog().constellations([hip_num])[0] or ''
         with st.expander(f"Details: {obj['name']}"):
             if obj['type'] == 'Star':
                 hip_match = re.search(r"HIP (\d+)", obj['name'])
@@ -1,108 +1,249 @@
-import os
-from skyfield.api import load, Topos, Star
-from skyfield.data import hipparcos
+import threading
 
-# Get the directory where astro_utils.py is located
-_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+import numpy as np
 
-# Construct absolute paths to the data files
-DE421_PATH = os.path.join(_CURRENT_DIR, "de421.bsp")
-HIPP_PATH = os.path.join(_CURRENT_DIR, "hip_main.dat")
+from ephemeris_utils import get_ephemeris, check_time_in_range, solar_system_bodies
+from minor_planet_utils import MINOR_PLANET_MAG_LIMIT, get_visible_minor_planets
+from satellite_utils import get_visible_satellites, find_passes
+from name_utils import get_name_index
+from visibility_utils import visibility_mask
+from table_utils import ObjectTable
+from cache_utils import LRUCache
+from star_utils import HIPP_PATH, STAR_POINT_BUDGET, get_star_catalog
+from dso_utils import DSO_MAG_LIMIT, DSO_MIN_SIZE_ARCMIN, get_dso_catalog, select_dsos
+
+# HIPP_PATH lived here before star_utils existed and is still exported for old callers
+__all__ = [
+    'HIPP_PATH', 'STAR_ROTATION_MAX_SECONDS', 'compute_altaz', 'star_altaz', 'star_update_counts',
+    'get_visible_objects', 'get_satellite_passes', 'index_target', 'locate_object',
+]
+
+# Skyfield (and pandas, through hipparcos) are imported inside the functions below
+# so that importing this module stays cheap; see check_import_time.py.
+
+# Star alt/az for a time within this many seconds of a cached reference epoch
+# is found by turning the reference's apparent positions through the change
+# in sidereal angle. Precession, nutation and aberration drift by about 0.5"
+# a day (0.07" after an hour, 0.4" after six); 0 always recomputes.
+STAR_ROTATION_MAX_SECONDS = 6 * 3600
+STAR_ROTATION_CACHE_MAX_ENTRIES = 16
+
+_STAR_REFERENCES = LRUCache(STAR_ROTATION_CACHE_MAX_ENTRIES)  # (lat, lon) -> reference epoch entry
+_STAR_UPDATE_COUNTS = {'rotated': 0, 'full': 0}
+_STAR_UPDATE_LOCK = threading.Lock()
+
+def compute_altaz(observer_at, ra_hours, dec_degrees):
+    """Apparent altitude/azimuth (degrees) for arrays of catalog positions.
+
+    All positions go through a single vectorized Skyfield Star, so the cost
+    is one observe() call regardless of how many objects are passed in.
+    """
+    from skyfield.api import Star
+
+    if len(ra_hours) == 0:
+        return ra_hours[:0], ra_hours[:0]
+    targets = Star(ra_hours=ra_hours, dec_degrees=dec_degrees)
+    alt, az, _ = observer_at.observe(targets).apparent().altaz()
+    return alt.degrees, az.degrees
+
+def _rotated_altaz(reference, t, lat, count):
+    """Alt/az (degrees) of the first `count` reference stars at `t`, by sidereal rotation alone."""
+    hour_angle = np.radians((t.gast - reference['gast']) * 15.0) + reference['hour_angle'][:count]
+    sin_dec, cos_dec = reference['sin_dec'][:count], reference['cos_dec'][:count]
+    phi = np.radians(lat)
+    cos_hour_angle = np.cos(hour_angle)
+    alt = np.arcsin(np.clip(np.sin(phi) * sin_dec + np.cos(phi) * cos_dec * cos_hour_angle, -1.0, 1.0))
+    az = np.arctan2(-cos_dec * np.sin(hour_angle), np.cos(phi) * sin_dec - np.sin(phi) * cos_dec * cos_hour_angle)
+    return np.degrees(alt), np.degrees(az) % 360.0
+
+def star_altaz(observer_at, catalog, count, lat, lon, max_rotation_seconds=STAR_ROTATION_MAX_SECONDS):
+    """Apparent alt/az (degrees) of the catalog's `count` brightest stars.
+
+    A full computation also keeps each star's apparent right ascension and
+    declination of date, per observer location, as a reference epoch. A
+    later call for the same place within `max_rotation_seconds` of it, for
+    no more stars, only turns those positions by the change in sidereal
+    angle. Anything else recomputes and replaces the reference.
+    star_update_counts() reports how often each path was taken.
+    """
+    from skyfield.api import Star
+
+    if count == 0:
+        return np.zeros(0), np.zeros(0)
+    t = observer_at.t
+    key = (lat, lon)
+    reference = _STAR_REFERENCES.get(key)
+    if (reference is not None and reference['catalog'] is catalog and count <= len(reference['sin_dec'])
+            and abs(t.tt - reference['tt']) * 86400.0 < max_rotation_seconds):
+        with _STAR_UPDATE_LOCK:
+            _STAR_UPDATE_COUNTS['rotated'] += 1
+        return _rotated_altaz(reference, t, lat, count)
+
+    targets = Star(ra_hours=catalog.ra_hours[:count], dec_degrees=catalog.dec_degrees[:count])
+    apparent = observer_at.observe(targets).apparent()
+    alt, az, _ = apparent.altaz()
+    ra, dec, _ = apparent.radec(epoch='date')
+    reference = {
+        'catalog': catalog,
+        'tt': t.tt,
+        'gast': t.gast,
+        'hour_angle': np.radians(t.gast * 15.0 + lon) - ra.radians,
+        'sin_dec': np.sin(dec.radians),
+        'cos_dec': np.cos(dec.radians),
+    }
+    _STAR_REFERENCES.put(key, reference)
+    with _STAR_UPDATE_LOCK:
+        _STAR_UPDATE_COUNTS['full'] += 1
+    return alt.degrees, az.degrees
+
+def star_update_counts():
+    """How many star_altaz() calls rotated a reference epoch and how many recomputed."""
+    with _STAR_UPDATE_LOCK:
+        return dict(_STAR_UPDATE_COUNTS)
+
+def get_visible_objects(lat, lon, user_dt=None, dso_mag_limit=DSO_MAG_LIMIT, dso_min_size=DSO_MIN_SIZE_ARCMIN,
+                        include_satellites=True, minor_planet_mag_limit=MINOR_PLANET_MAG_LIMIT, filters=None,
+                        zoom=1.0, star_budget=STAR_POINT_BUDGET, star_rotation_seconds=STAR_ROTATION_MAX_SECONDS):
+    """Objects passing the visibility filters (see visibility_utils.make_filters).
+
+    With the default filters this is everything above the horizon. Stars
+    are taken brightest-first, as many as StarCatalog.level_of_detail()
+    allows for the chart `zoom` and `star_budget`; their positions may be
+    rotated from a reference epoch up to `star_rotation_seconds` away
+    (see star_altaz). Each group of objects is tested with one vectorized visibility_mask() call
+    and kept as an ObjectTable slice, so no per-object dicts are built;
+    call .records() on the result for the old list-of-dicts form.
+    """
+    from skyfield.api import load, Topos
 
-def get_visible_objects(lat, lon, user_dt=None):
     ts = load.timescale()
     t = ts.from_datetime(user_dt) if user_dt else ts.now()
-    planets = load(DE421_PATH)
+    planets = get_ephemeris()
+    check_time_in_range(planets, t)
     earth = planets['earth']
     observer = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
-    visible = []
-
-    # Mapping of integer keys to planet names and types
-    PLANET_KEY_MAP = {
-        199: ('Mercury', 'Planet'),
-        299: ('Venus', 'Planet'),
-        399: ('Earth', None),  # skip Earth
-        301: ('Moon', 'Moon'),
-        499: ('Mars', 'Planet'),
-        599: ('Jupiter', 'Planet'),
-        699: ('Saturn', 'Planet'),
-        799: ('Uranus', 'Planet'),
-        899: ('Neptune', 'Planet'),
-        999: ('Pluto', 'Planet'),
-        10: ('Sun', 'Sun'),
-    }
+    groups = []
 
-    # Diagnostic print: Show all names from the ephemeris
-    print("Bodies loaded from ephemeris:", planets.names())
-
-    for name in planets.names():
-        # Handle integer keys for planets
-        if isinstance(name, int) and name in PLANET_KEY_MAP:
-            pretty_name, obj_type = PLANET_KEY_MAP[name]
-            if obj_type is None:
-                continue  # skip Earth
-            try:
-                body = planets[name]
-                alt, az, _ = observer.at(t).observe(body).apparent().altaz()
-                if alt.degrees > 0:
-                    visible.append({
-                        'name': pretty_name,
-                        'type': obj_type,
-                        'altitude': round(alt.degrees, 2),
-                        'azimuth': round(az.degrees, 2)
-                    })
-            except Exception as e:
-                print(f"Could not process {name}: {e}")
-            continue
-
-        # Handle string names (legacy)
-        if name == 'earth':
-            continue
+    observer_at = observer.at(t)
+    names, types, alts, azs = [], [], [], []
+    for pretty_name, obj_type, body in solar_system_bodies(planets):
         try:
-            body = planets[name]
-            alt, az, _ = observer.at(t).observe(body).apparent().altaz()
-            if alt.degrees > 0:
-                pretty_name = str(name).replace(' barycenter', '').capitalize()
-                name_str = str(name).lower()
-                if name_str == 'sun':
-                    obj_type = 'Sun'
-                elif name_str == 'moon':
-                    obj_type = 'Moon'
-                elif pretty_name in ['Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']:
-                    obj_type = 'Planet'
-                else:
-                    if pretty_name not in ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']:
-                        continue
-                visible.append({
-                    'name': pretty_name,
-                    'type': obj_type,
-                    'altitude': round(alt.degrees, 2),
-                    'azimuth': round(az.degrees, 2)
-                })
+            alt, az, _ = observer_at.observe(body).apparent().altaz()
         except Exception as e:
-            print(f"Could not process {name}: {e}")
+            print(f"Could not process {pretty_name}: {e}")
             continue
-    
-    with open(HIPP_PATH, 'rb') as f:
-        stars = hipparcos.load_dataframe(f)
-    bright_stars = stars[stars['magnitude'] < 2.0]
-    for hip, star_row in bright_stars.iterrows():
-        star = Star(ra_hours=star_row['ra_hours'], dec_degrees=star_row['dec_degrees'])
-        alt, az, _ = observer.at(t).observe(star).apparent().altaz()
-        if alt.degrees > 0:
-            proper_name = star_row.get('proper')
-            hip_id_int = int(hip) # HIP ID as integer for map lookup
-            hip_id_str = f"HIP {hip_id_int}"
-            
-            # Determine the primary display name for H1
-            display_name_h1 = proper_name if proper_name and proper_name.strip() else hip_id_str
-            
-            visible.append({
-                'name': display_name_h1, # Primary name for H1 (Common name or HIP ID)
-                'hip_id': hip_id_str,    # Always the HIP ID, for H2
-                'hip_int': hip_id_int, # Add integer HIP ID for constellation lookup
-                'type': 'Star',
-                'altitude': round(alt.degrees, 2),
-                'azimuth': round(az.degrees, 2)
-            })
+        names.append(pretty_name)
+        types.append(obj_type)
+        alts.append(alt.degrees)
+        azs.append(az.degrees)
+    bodies = ObjectTable(name=np.array(names, dtype=object), type=np.array(types, dtype=object),
+                         altitude=np.array(alts, dtype=np.float64), azimuth=np.array(azs, dtype=np.float64))
+    conditions = {}
+    for i, obj_type in enumerate(types):
+        if obj_type == 'Sun':
+            conditions['sun_altitude'] = alts[i]
+        elif obj_type == 'Moon':
+            conditions['moon_altitude'], conditions['moon_azimuth'] = alts[i], azs[i]
+    keep = visibility_mask(bodies['altitude'], bodies['azimuth'], None, filters, conditions, bodies['type'] == 'Moon')
+    groups.append(bodies[keep])
+
+    catalog = get_star_catalog()
+    bright = catalog.brightest(catalog.level_of_detail(zoom, star_budget))
+    alts, azs = star_altaz(observer_at, catalog, bright.stop, lat, lon, star_rotation_seconds)
+    keep = visibility_mask(alts, azs, catalog.magnitude[bright], filters, conditions)
+    rows = np.flatnonzero(keep)  # the brightest-first slice starts at row 0
+    hip_ids = np.char.add("HIP ", catalog.hip[rows].astype(str)).astype(object)
+    star_names = catalog.name[rows]
+    groups.append(ObjectTable(
+        name=np.where(np.equal(star_names, None), hip_ids, star_names),  # HIP id when unnamed
+        hip_id=hip_ids,
+        hip_int=catalog.hip[rows],
+        type='Star',
+        magnitude=catalog.magnitude[rows].round(2),
+        constellation=catalog.constellation[rows],
+        altitude=alts[keep],
+        azimuth=azs[keep],
+    ))
+
+    # Deep-sky objects (Messier/NGC/IC), filtered before the batched position computation
+    dsos = get_dso_catalog()
+    selected = select_dsos(dsos, dso_mag_limit, dso_min_size)
+    alts, azs = compute_altaz(observer_at, dsos['ra_hours'][selected], dsos['dec_degrees'][selected])
+    above = visibility_mask(alts, azs, dsos['magnitude'][selected], filters, conditions)
+    rows = selected[above]
+    groups.append(ObjectTable(
+        name=dsos['display_name'][rows],
+        designation=dsos['designation'][rows],
+        wiki_title=dsos['wiki_title'][rows],
+        type='Deep Sky',
+        dso_type=dsos['dso_type'][rows],
+        magnitude=dsos['magnitude'][rows].astype(np.float64).round(2),
+        size_arcmin=dsos['size_arcmin'][rows].astype(np.float64).round(1),
+        constellation=dsos['constellation'][rows],
+        altitude=alts[above],
+        azimuth=azs[above],
+    ))
+
+    # Asteroids and comets from local MPC element files
+    if minor_planet_mag_limit is not None:
+        groups.append(get_visible_minor_planets(observer, t, planets, mag_limit=minor_planet_mag_limit,
+                                                filters=filters, conditions=conditions))
+
+    # Artificial satellites from the local TLE file (sunlit and above the horizon mask)
+    if include_satellites:
+        groups.append(get_visible_satellites(lat, lon, t, planets, filters=filters, conditions=conditions))
+
+    visible = ObjectTable.concat(groups)
+    visible['altitude'] = visible['altitude'].astype(np.float64).round(2)
+    visible['azimuth'] = visible['azimuth'].astype(np.float64).round(2)
     return visible
+
+def get_satellite_passes(lat, lon, user_dt=None, hours=12.0, name_filter=None):
+    """Upcoming satellite passes for a location, starting at user_dt (or now)."""
+    from skyfield.api import load
+
+    ts = load.timescale()
+    t = ts.from_datetime(user_dt) if user_dt else ts.now()
+    planets = get_ephemeris()
+    return find_passes(lat, lon, t, planets, hours=hours, name_filter=name_filter)
+
+def index_target(record, planets):
+    """Skyfield target for a name-index match: its ephemeris body, or a Star at its catalog position.
+
+    Returns None if the body is not in the loaded ephemeris.
+    """
+    from skyfield.api import Star
+
+    index = get_name_index()
+    oid = record['id']
+    kernel_names = index['body'][oid]
+    if kernel_names is not None:
+        return next((planets[name] for name in kernel_names if name in planets), None)
+    return Star(ra_hours=float(index['ra_hours'][oid]), dec_degrees=float(index['dec_degrees'][oid]))
+
+def locate_object(record, lat, lon, user_dt=None):
+    """Where a name-index match (from name_utils.search_names) is in the sky right now.
+
+    Returns a dict with name, type, altitude, azimuth and above_horizon, or
+    None if the body is not in the loaded ephemeris.
+    """
+    from skyfield.api import load, Topos
+
+    ts = load.timescale()
+    t = ts.from_datetime(user_dt) if user_dt else ts.now()
+    planets = get_ephemeris()
+    check_time_in_range(planets, t)
+    observer_at = (planets['earth'] + Topos(latitude_degrees=lat, longitude_degrees=lon)).at(t)
+
+    target = index_target(record, planets)
+    if target is None:
+        return None
+    alt, az, _ = observer_at.observe(target).apparent().altaz()
+    alt, az = alt.degrees, az.degrees
+    return {
+        'name': record['name'],
+        'type': record['type'],
+        'altitude': round(float(alt), 2),
+        'azimuth': round(float(az), 2),
+        'above_horizon': bool(alt > 0),
+    }
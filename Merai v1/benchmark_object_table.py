@@ -0,0 +1,95 @@
+# benchmark_object_table.py
+"""Compares the memory of a visible-object list of dicts with an ObjectTable.
+
+Builds the same synthetic mix of stars and deep-sky objects both ways and
+measures the allocations with tracemalloc.
+
+    python benchmark_object_table.py [--count 10000]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from table_utils import ObjectTable
+
+DSO_TYPES = np.array(['Galaxy', 'Open Cluster', 'Globular Cluster', 'Planetary Nebula'], dtype=object)
+
+
+def synthetic_columns(count, seed=1):
+    """Catalog-like columns (the inputs both representations are built from)."""
+    rng = np.random.default_rng(seed)
+    half = count // 2
+    hips = rng.choice(np.arange(1, 120000), size=half, replace=False)
+    return {
+        'hip': hips,
+        'hip_id': np.char.add("HIP ", hips.astype(str)).astype(object),
+        'designation': np.char.add("NGC ", np.arange(count - half).astype(str)).astype(object),
+        'dso_type': DSO_TYPES[rng.integers(0, len(DSO_TYPES), count - half)],
+        'altitude': rng.uniform(0, 90, count),
+        'azimuth': rng.uniform(0, 360, count),
+        'magnitude': rng.uniform(-1, 12, count),
+    }
+
+
+def build_dicts(c):
+    """The list-of-dicts shape get_visible_objects used to return."""
+    half = len(c['hip'])
+    objects = []
+    for i in range(half):
+        objects.append({
+            'name': c['hip_id'][i], 'hip_id': c['hip_id'][i], 'hip_int': int(c['hip'][i]),
+            'type': 'Star', 'magnitude': round(float(c['magnitude'][i]), 2),
+            'altitude': round(float(c['altitude'][i]), 2), 'azimuth': round(float(c['azimuth'][i]), 2),
+        })
+    for j in range(len(c['designation'])):
+        i = half + j
+        objects.append({
+            'name': c['designation'][j], 'designation': c['designation'][j], 'wiki_title': c['designation'][j],
+            'type': 'Deep Sky', 'dso_type': c['dso_type'][j], 'magnitude': round(float(c['magnitude'][i]), 2),
+            'altitude': round(float(c['altitude'][i]), 2), 'azimuth': round(float(c['azimuth'][i]), 2),
+        })
+    return objects
+
+
+def build_table(c):
+    half = len(c['hip'])
+    stars = ObjectTable(name=c['hip_id'], hip_id=c['hip_id'], hip_int=c['hip'], type='Star',
+                        magnitude=c['magnitude'][:half].round(2), altitude=c['altitude'][:half].round(2),
+                        azimuth=c['azimuth'][:half].round(2))
+    dsos = ObjectTable(name=c['designation'], designation=c['designation'], wiki_title=c['designation'],
+                       type='Deep Sky', dso_type=c['dso_type'], magnitude=c['magnitude'][half:].round(2),
+                       altitude=c['altitude'][half:].round(2), azimuth=c['azimuth'][half:].round(2))
+    return ObjectTable.concat([stars, dsos])
+
+
+def measure(builder, columns):
+    """(result, bytes still allocated, peak bytes, seconds) for builder(columns)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = builder(columns)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000, help="Number of objects")
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.count)
+    dicts, dict_bytes, dict_peak, dict_time = measure(build_dicts, columns)
+    table, table_bytes, table_peak, table_time = measure(build_table, columns)
+    assert table.records() == dicts, "ObjectTable records() differ from the list of dicts"
+
+    print(f"{args.count} objects")
+    print(f"  list of dicts: {dict_bytes / 1024:8.0f} KiB (peak {dict_peak / 1024:.0f} KiB), built in {dict_time * 1000:.1f} ms")
+    print(f"  ObjectTable:   {table_bytes / 1024:8.0f} KiB (peak {table_peak / 1024:.0f} KiB), built in {table_time * 1000:.1f} ms")
+    print(f"  saved {(1 - table_bytes / dict_bytes) * 100:.0f}% of retained memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# cache_utils.py
+import threading
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with a bounded total size.
+
+    Each value counts as `sizeof(value)` (1 by default, so `max_size` is an
+    entry count; pass len to bound bytes). Once the total passes
+    `max_size`, the least recently used entries are evicted. A value larger
+    than `max_size` on its own is not stored.
+    """
+    __slots__ = ('max_size', '_sizeof', '_entries', '_size', '_lock')
+
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self._sizeof = sizeof
+        self._entries = {}  # key -> (value, size), least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """The cached value for `key` (now the most recently used), or `default`."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._entries[key] = entry
+            return entry[0]
+
+    def put(self, key, value):
+        """Stores `value` as the most recently used entry, evicting as needed."""
+        size = 1 if self._sizeof is None else self._sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                self._size -= self._entries.pop(next(iter(self._entries)))[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
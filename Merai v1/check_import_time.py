@@ -0,0 +1,94 @@
+# check_import_time.py
+"""Measures what main.py imports before the first widget is drawn.
+
+Runs `python -X importtime` on main.py's top-level imports (Streamlit itself
+excluded, since the runtime has already loaded it) and fails if they take
+longer than the budget or pull in a dependency that should load on first use.
+
+    python check_import_time.py [--budget 0.3]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(_CURRENT_DIR, "main.py")
+
+IMPORT_BUDGET_SECONDS = 0.3
+
+# Must not be imported until the feature that needs them is used
+DEFERRED_MODULES = (
+    'folium', 'streamlit_folium', 'plotly', 'bs4', 'geocoder', 'requests',
+    'skyfield', 'jplephem', 'sgp4', 'pandas', 'matplotlib', 'scipy',
+)
+
+
+def top_level_imports(path=MAIN_PATH):
+    """Module names imported at the top level of `path`, in order."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [m for m in modules if m.split('.')[0] != 'streamlit']
+
+
+def _importtime(code):
+    """Runs `code` under -X importtime; returns (stdout, {top-level module: seconds})."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=_CURRENT_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cum_us, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # nested imports are already in their parent's total
+            cumulative[name.strip()] = int(cum_us) / 1e6
+    return proc.stdout, cumulative
+
+
+def measure(modules):
+    """Returns (total seconds, {module: cumulative seconds}, set of loaded modules)."""
+    code = (
+        "import sys, time; start = time.perf_counter(); import " + ", ".join(modules) +
+        "; print(time.perf_counter() - start); print(' '.join(sorted(sys.modules)))"
+    )
+    stdout, cumulative = _importtime(code)
+    _, interpreter_startup = _importtime("pass")
+    for name in interpreter_startup:
+        cumulative.pop(name, None)
+    elapsed, loaded = stdout.splitlines()
+    return float(elapsed), cumulative, set(loaded.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_SECONDS,
+                        help="Maximum seconds for main.py's imports")
+    args = parser.parse_args()
+
+    modules = top_level_imports()
+    total, cumulative, loaded = measure(modules)
+
+    print(f"main.py imports: {', '.join(modules)}")
+    for name, seconds in sorted(cumulative.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+    print(f"Total: {total * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+
+    leaked = sorted(m for m in DEFERRED_MODULES if m in loaded)
+    if leaked:
+        print(f"FAIL: imported at start-up but should be deferred: {', '.join(leaked)}")
+    if total > args.budget:
+        print("FAIL: import-time budget exceeded")
+    return 1 if leaked or total > args.budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,11 @@
 # constellation_utils.py
 import csv
+import os
 
-# Updated file path to the new CSV data source
-CONSTELLATION_FILE_PATH = r"D:\\NITM ED\\Coding - Python\\GITHUB\\Space-Detective\\Merai v1\\hygdata_v41.csv"
+# HYG database, expected next to this module like the other data files
+CONSTELLATION_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hygdata_v41.csv")
+
+_CONSTELLATION_MAP = None
 
 # Full constellation names from abbreviations (remains the same)
 CONSTELLATION_NAMES = {
@@ -21,7 +24,7 @@ CONSTELLATION_NAMES = {
     "ORI": "Orion", "PAV": "Pavo", "PEG": "Pegasus", "PER": "Perseus", "PHE": "Phoenix",
     "PIC": "Pictor", "PSA": "Piscis Austrinus", "PSC": "Pisces", "PUP": "Puppis", "PYX": "Pyxis",
     "RET": "Reticulum", "SCL": "Sculptor", "SCO": "Scorpius", "SCT": "Scutum", "SER": "Serpens",
-    "SEX": "Sextans", "SGE": "Sagitta", "SGR": "Sagittarius", "TAH": "Taurus", "TEL": "Telescopium",
+    "SEX": "Sextans", "SGE": "Sagitta", "SGR": "Sagittarius", "TAH": "Taurus", "TAU": "Taurus", "TEL": "Telescopium",
     "TRA": "Triangulum Australe", "TRI": "Triangulum", "TUC": "Tucana", "UMA": "Ursa Major",
     "UMI": "Ursa Minor", "VEL": "Vela", "VIR": "Virgo", "VOL": "Volans", "VUL": "Vulpecula"
 }
@@ -81,3 +84,10 @@ def load_constellation_data(file_path=CONSTELLATION_FILE_PATH):
         print("Note: 'TAH' is used for Taurus. If 'TAU' is expected from CSV, update CONSTELLATION_NAMES.")
 
     return constellation_map
+
+def get_constellation_map():
+    """Returns the HIP -> constellation map, reading the CSV on first use."""
+    global _CONSTELLATION_MAP
+    if _CONSTELLATION_MAP is None:
+        _CONSTELLATION_MAP = load_constellation_data()
+    return _CONSTELLATION_MAP
@@ -0,0 +1,109 @@
+# dso_utils.py
+import csv
+import os
+
+import numpy as np
+
+from constellation_utils import CONSTELLATION_NAMES
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bundled Messier + NGC/IC extract (derived from OpenNGC, CC-BY-SA-4.0)
+DSO_CATALOG_PATH = os.path.join(_CURRENT_DIR, "dso_catalog.csv")
+
+# Default filters: roughly what binoculars show under a suburban sky
+DSO_MAG_LIMIT = 6.0
+DSO_MIN_SIZE_ARCMIN = 0.0
+
+# OpenNGC type codes to readable names
+DSO_TYPE_NAMES = {
+    "OCl": "Open Cluster", "GCl": "Globular Cluster", "Cl+N": "Cluster with Nebula",
+    "G": "Galaxy", "GPair": "Galaxy Pair", "GTrpl": "Galaxy Triplet",
+    "GGroup": "Galaxy Group", "PN": "Planetary Nebula", "HII": "HII Region",
+    "DrkN": "Dark Nebula", "EmN": "Emission Nebula", "Neb": "Nebula",
+    "RfN": "Reflection Nebula", "SNR": "Supernova Remnant",
+    "*Ass": "Star Cloud", "**": "Double Star",
+}
+
+_DSO_CATALOG = None
+
+
+def load_dso_catalog(file_path=DSO_CATALOG_PATH):
+    """Loads the deep-sky catalog into a dict of parallel NumPy columns.
+
+    Numeric columns are float arrays (NaN where the catalog has no value),
+    text columns are object arrays. Returns empty columns if the file is missing.
+    """
+    columns = {
+        'designation': [], 'catalog_name': [], 'dso_type': [], 'ra_hours': [],
+        'dec_degrees': [], 'magnitude': [], 'size_arcmin': [],
+        'constellation': [], 'common_name': [],
+    }
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                columns['designation'].append(row['designation'])
+                columns['catalog_name'].append(row['catalog_name'])
+                columns['dso_type'].append(DSO_TYPE_NAMES.get(row['type'], row['type']))
+                columns['ra_hours'].append(float(row['ra_hours']))
+                columns['dec_degrees'].append(float(row['dec_degrees']))
+                columns['magnitude'].append(float(row['magnitude']) if row['magnitude'] else np.nan)
+                columns['size_arcmin'].append(float(row['size_arcmin']) if row['size_arcmin'] else np.nan)
+                abbr = row['constellation'].upper()
+                columns['constellation'].append(CONSTELLATION_NAMES.get(abbr, row['constellation']))
+                columns['common_name'].append(row['common_name'])
+    except FileNotFoundError:
+        print(f"Error: Deep-sky catalog not found at {file_path}")
+
+    catalog = {}
+    for key, values in columns.items():
+        if key in ('ra_hours', 'dec_degrees'):
+            catalog[key] = np.array(values, dtype=np.float64)
+        elif key in ('magnitude', 'size_arcmin'):
+            catalog[key] = np.array(values, dtype=np.float32)
+        else:
+            catalog[key] = np.array(values, dtype=object)
+    # Precomputed so result tables can slice them instead of building strings per object
+    rows = range(len(catalog['designation']))
+    catalog['display_name'] = np.array([dso_display_name(catalog, i) for i in rows], dtype=object)
+    catalog['wiki_title'] = np.array([dso_wiki_title(catalog, i) for i in rows], dtype=object)
+    return catalog
+
+
+def get_dso_catalog():
+    """Returns the deep-sky catalog, loading it on first use."""
+    global _DSO_CATALOG
+    if _DSO_CATALOG is None:
+        _DSO_CATALOG = load_dso_catalog()
+    return _DSO_CATALOG
+
+
+def select_dsos(catalog, max_magnitude=DSO_MAG_LIMIT, min_size_arcmin=DSO_MIN_SIZE_ARCMIN):
+    """Returns indices of catalog rows passing the magnitude and size filters.
+
+    Objects without a catalogued magnitude always pass the magnitude filter
+    (as in visibility_utils.visibility_mask); objects without a catalogued
+    size pass the size filter only when it is 0.
+    """
+    keep = ~(catalog['magnitude'] > max_magnitude)
+    if min_size_arcmin > 0:
+        keep &= catalog['size_arcmin'] >= min_size_arcmin
+    return np.flatnonzero(keep)
+
+
+def dso_display_name(catalog, idx):
+    """Common name if there is one (e.g. 'Andromeda Galaxy'), else the designation."""
+    return catalog['common_name'][idx] or catalog['designation'][idx]
+
+
+def dso_wiki_title(catalog, idx):
+    """Wikipedia article title for a deep-sky object ('M31' -> 'Messier 31').
+
+    Every Messier object has a 'Messier N' article (or redirect), while
+    catalog common names such as 'Beehive' or 'Small Sgr Star Cloud' are
+    often not article titles, so the common name is only the fallback.
+    """
+    designation = catalog['designation'][idx]
+    if designation.startswith('M') and designation[1:].isdigit():
+        return f"Messier {designation[1:]}"
+    return catalog['common_name'][idx] or designation
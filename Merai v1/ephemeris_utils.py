@@ -0,0 +1,123 @@
+# ephemeris_utils.py
+import argparse
+import os
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Kernel to use; set MERAI_EPHEMERIS to e.g. a trimmed de440 subset made with this module
+EPHEMERIS_PATH = os.environ.get("MERAI_EPHEMERIS", os.path.join(_CURRENT_DIR, "de421.bsp"))
+
+# (display name, object type, kernel names to try in order). Newer kernels such as
+# DE440 only carry barycenters for the outer planets, so those come second.
+SOLAR_SYSTEM_BODIES = [
+    ('Sun', 'Sun', ['sun']),
+    ('Moon', 'Moon', ['moon']),
+    ('Mercury', 'Planet', ['mercury', 'mercury barycenter']),
+    ('Venus', 'Planet', ['venus', 'venus barycenter']),
+    ('Mars', 'Planet', ['mars', 'mars barycenter']),
+    ('Jupiter', 'Planet', ['jupiter', 'jupiter barycenter']),
+    ('Saturn', 'Planet', ['saturn', 'saturn barycenter']),
+    ('Uranus', 'Planet', ['uranus', 'uranus barycenter']),
+    ('Neptune', 'Planet', ['neptune', 'neptune barycenter']),
+    ('Pluto', 'Planet', ['pluto', 'pluto barycenter']),
+]
+
+# NAIF ids of the segments the app needs: barycenters 1-9, Sun, Moon, Earth,
+# and the planet-centre offsets that some kernels provide.
+SUBSET_TARGETS = {1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 199, 299, 301, 399, 499}
+# Subset dates are UTC days but kernels run on TDB, which is about 69 s ahead;
+# this much extra at each end keeps the first and last UTC minutes covered.
+SUBSET_MARGIN_DAYS = 5.0 / 1440
+
+_EPHEMERIS = {}
+
+
+def get_ephemeris(path=None):
+    """Returns the configured SPK kernel, opened once per process.
+
+    jplephem memory-maps each segment on first access, so a worker only
+    pages in the coefficients it actually evaluates.
+    """
+    path = path or EPHEMERIS_PATH
+    if path not in _EPHEMERIS:
+        from skyfield.api import load_file
+        _EPHEMERIS[path] = load_file(path)
+    return _EPHEMERIS[path]
+
+
+def ephemeris_date_range(kernel):
+    """(start_jd, end_jd) covered by every segment of the kernel."""
+    segments = kernel.spk.segments
+    return max(s.start_jd for s in segments), min(s.end_jd for s in segments)
+
+
+def check_time_in_range(kernel, t):
+    """Raises ValueError if Skyfield time `t` is outside the kernel's coverage."""
+    start_jd, end_jd = ephemeris_date_range(kernel)
+    if not start_jd <= t.tdb <= end_jd:
+        raise ValueError(
+            f"{t.utc_strftime('%Y-%m-%d')} is outside the ephemeris {kernel.filename}, "
+            f"which covers JD {start_jd:.1f} to {end_jd:.1f}."
+        )
+
+
+def solar_system_bodies(kernel):
+    """Yields (display name, object type, body) for each body the kernel provides."""
+    for pretty_name, obj_type, candidates in SOLAR_SYSTEM_BODIES:
+        for name in candidates:
+            try:
+                body = kernel[name]
+            except KeyError:
+                continue
+            yield pretty_name, obj_type, body
+            break
+
+
+def _parse_date(text):
+    """Julian date of 00:00 on a 'YYYY-MM-DD' date."""
+    from jplephem.calendar import compute_julian_date
+
+    year, month, day = (int(part) for part in text.split('-'))
+    return compute_julian_date(year, month, day)
+
+
+def make_ephemeris_subset(input_path, output_path, start_date, end_date, targets=SUBSET_TARGETS):
+    """Writes an SPK excerpt holding only `targets` from the start of one
+    'YYYY-MM-DD' date to the end of another (both days included).
+
+    Segments are clipped to whole Chebyshev records covering the range, so
+    positions inside it are bit-for-bit identical to the full kernel.
+    """
+    from jplephem.daf import DAF
+    from jplephem.excerpter import write_excerpt
+    from jplephem.spk import SPK
+
+    start_jd = _parse_date(start_date) - SUBSET_MARGIN_DAYS
+    end_jd = _parse_date(end_date) + 1.0 + SUBSET_MARGIN_DAYS
+    with open(input_path, 'rb') as f:
+        spk = SPK(DAF(f))
+        summaries = [
+            summary for summary, segment in zip(spk.daf.summaries(), spk.segments)
+            if segment.target in targets
+        ]
+        with open(output_path, 'w+b') as output_file:
+            write_excerpt(spk, output_file, start_jd, end_jd, summaries)
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extract a compact SPK subset for Merai.")
+    parser.add_argument('input_path', help="Full kernel, e.g. de440.bsp")
+    parser.add_argument('output_path', help="Subset file to write")
+    parser.add_argument('--start', default='1900-01-01', help="First date to keep (YYYY-MM-DD)")
+    parser.add_argument('--end', default='2100-01-01', help="Last date to keep, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from jplephem.daf import DAF
+    from jplephem.spk import SPK
+
+    make_ephemeris_subset(args.input_path, args.output_path, args.start, args.end)
+    with open(args.output_path, 'rb') as f:
+        print(SPK(DAF(f)))
+    print(f"Wrote {args.output_path} ({os.path.getsize(args.output_path) / 1e6:.1f} MB). "
+          f"Use it with MERAI_EPHEMERIS={args.output_path}")
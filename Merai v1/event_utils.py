@@ -0,0 +1,221 @@
+# event_utils.py
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+import numpy as np
+
+from cache_utils import LRUCache
+from ephemeris_utils import get_ephemeris, check_time_in_range, ephemeris_date_range, solar_system_bodies
+from star_utils import get_star_catalog
+
+# Planets taking part in conjunctions; oppositions only happen for the outer ones
+CONJUNCTION_PLANETS = ('Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune')
+OPPOSITION_PLANETS = ('Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune')
+
+# Closest-approach limits (degrees, geocentric)
+CONJUNCTION_MAX_SEPARATION = 5.0
+MOON_APPROACH_MAX_SEPARATION = 3.0
+# Stars the Moon is checked against; only those near the ecliptic can ever be reached
+MOON_STAR_MAG_LIMIT = 1.5
+MOON_STAR_MAX_ECLIPTIC_LATITUDE = 9.0
+
+# Coarse grid step. The Moon moves about 3.3° in six hours, so every
+# approach shows up as a sampled local minimum; the margin lets samples
+# either side of a close approach through the first cut.
+EVENT_SAMPLE_HOURS = 6.0
+EVENT_SAMPLE_MARGIN = 2.0
+# Bisection steps refining each candidate (12 h bracket / 2**14 ≈ 3 s)
+EVENT_REFINE_STEPS = 14
+EVENT_CACHE_MAX_ENTRIES = 32
+
+# J2000 mean obliquity, for ecliptic longitudes from ICRF vectors
+_OBLIQUITY = np.radians(23.4392911)
+_DERIVATIVE_STEP_DAYS = 1.0 / 1440
+
+_EVENT_CACHE = LRUCache(EVENT_CACHE_MAX_ENTRIES)  # (first day, last day, limits) -> events
+
+
+def _event_bodies(planets):
+    """Sun, Moon, planets and the Moon's bright ecliptic stars, as name/kind dicts.
+
+    Solar-system bodies carry their ephemeris 'target'; stars carry a fixed
+    ICRS unit vector, 'direction' (proper motion and aberration are far
+    below the search's resolution).
+    """
+    bodies = []
+    for pretty_name, obj_type, body in solar_system_bodies(planets):
+        if obj_type in ('Sun', 'Moon') or pretty_name in CONJUNCTION_PLANETS:
+            bodies.append({'name': pretty_name, 'kind': obj_type, 'target': body})
+    catalog = get_star_catalog()
+    bright = catalog.brightest(catalog.count_brighter_than(MOON_STAR_MAG_LIMIT))
+    for row in range(bright.start, bright.stop):
+        ra, dec = np.radians(catalog.ra_hours[row] * 15.0), np.radians(catalog.dec_degrees[row])
+        direction = np.array([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)])
+        if abs(np.degrees(_ecliptic_latitude(direction))) > MOON_STAR_MAX_ECLIPTIC_LATITUDE:
+            continue
+        name = catalog.name[row] or f"HIP {catalog.hip[row]}"
+        bodies.append({'name': name, 'kind': 'Star', 'direction': direction})
+    return bodies
+
+
+def _ecliptic_latitude(unit):
+    return np.arcsin(np.clip(unit[2] * np.cos(_OBLIQUITY) - unit[1] * np.sin(_OBLIQUITY), -1.0, 1.0))
+
+
+def _ecliptic_longitude(unit):
+    return np.arctan2(unit[1] * np.cos(_OBLIQUITY) + unit[2] * np.sin(_OBLIQUITY), unit[0])
+
+
+def _directions(bodies, which, tt, ts, earth):
+    """Geocentric astrometric unit vectors (3, n) toward bodies[which[k]] at TT Julian date tt[k].
+
+    Each body is observed once for all of its times; stars keep their catalog direction.
+    """
+    out = np.empty((3, len(tt)))
+    for b in np.unique(which):
+        selected = which == b
+        body = bodies[b]
+        if 'direction' in body:
+            out[:, selected] = body['direction'][:, None]
+        else:
+            position = earth.at(ts.tt_jd(tt[selected])).observe(body['target']).position.au
+            out[:, selected] = position / np.linalg.norm(position, axis=0)
+    return out
+
+
+def _separation(bodies, first, second, tt, ts, earth):
+    """Angular separation in degrees between bodies[first[k]] and bodies[second[k]] at tt[k]."""
+    a = _directions(bodies, first, tt, ts, earth)
+    b = _directions(bodies, second, tt, ts, earth)
+    return np.degrees(np.arccos(np.clip((a * b).sum(axis=0), -1.0, 1.0)))
+
+
+def _bisect(func, lo, hi, steps=EVENT_REFINE_STEPS):
+    """Vectorized bisection for roots of func, which must be <= 0 at lo and > 0 at hi."""
+    for _ in range(steps):
+        mid = (lo + hi) / 2
+        positive = func(mid) > 0
+        hi = np.where(positive, mid, hi)
+        lo = np.where(positive, lo, mid)
+    return (lo + hi) / 2
+
+
+def _closest_approaches(bodies, pairs, limits, grid, ts, earth):
+    """(pair index, TT, separation) of every approach within its pair's limit."""
+    first, second = pairs[:, 0], pairs[:, 1]
+    directions = np.stack([_directions(bodies, np.full(len(grid), b), grid, ts, earth) for b in range(len(bodies))])
+    cos_separation = np.einsum('pit,pit->pt', directions[first], directions[second])
+    separation = np.degrees(np.arccos(np.clip(cos_separation, -1.0, 1.0)))
+    # Sampled local minima, with room for the true minimum to fall between samples
+    minimum = (separation[:, 1:-1] <= separation[:, :-2]) & (separation[:, 1:-1] < separation[:, 2:])
+    minimum &= separation[:, 1:-1] < (limits + EVENT_SAMPLE_MARGIN)[:, None]
+    pair, sample = np.nonzero(minimum)
+    if len(pair) == 0:
+        return pair, grid[:0], grid[:0]
+    sample += 1
+    a, b = first[pair], second[pair]
+
+    def slope(tt):
+        return (_separation(bodies, a, b, tt + _DERIVATIVE_STEP_DAYS, ts, earth)
+                - _separation(bodies, a, b, tt - _DERIVATIVE_STEP_DAYS, ts, earth))
+
+    tt = _bisect(slope, grid[sample - 1], grid[sample + 1])
+    closest = _separation(bodies, a, b, tt, ts, earth)
+    close_enough = closest <= limits[pair]
+    return pair[close_enough], tt[close_enough], closest[close_enough]
+
+
+def _oppositions(bodies, grid, ts, earth):
+    """(body index, TT) of each opposition: the planet's ecliptic longitude 180° from the Sun's."""
+    sun = next(i for i, body in enumerate(bodies) if body['kind'] == 'Sun')
+    outer = np.array([i for i, body in enumerate(bodies) if body['name'] in OPPOSITION_PLANETS], dtype=int)
+    if len(outer) == 0:
+        return outer, grid[:0]
+    sun_longitude = _ecliptic_longitude(_directions(bodies, np.full(len(grid), sun), grid, ts, earth))
+
+    def offset(body, tt, sun_lon):
+        longitude = _ecliptic_longitude(_directions(bodies, body, tt, ts, earth))
+        return np.pi - (longitude - sun_lon) % (2 * np.pi)  # zero at opposition, rising through it
+
+    planet, crossing = [], []
+    for b in outer:
+        f = offset(np.full(len(grid), b), grid, sun_longitude)
+        # Zero crossings away from the +-pi wrap (which is conjunction with the Sun)
+        up = (f[:-1] <= 0) & (f[1:] > 0) & (np.abs(f[:-1]) < np.pi / 2) & (np.abs(f[1:]) < np.pi / 2)
+        planet.extend([b] * up.sum())
+        crossing.extend(np.flatnonzero(up))
+    planet, crossing = np.array(planet, dtype=int), np.array(crossing, dtype=int)
+    if len(planet) == 0:
+        return planet, grid[:0]
+    sun_index = np.full(len(planet), sun)
+
+    def planet_offset(tt):
+        return offset(planet, tt, _ecliptic_longitude(_directions(bodies, sun_index, tt, ts, earth)))
+
+    return planet, _bisect(planet_offset, grid[crossing], grid[crossing + 1])
+
+
+def find_events(start, end, conjunction_limit=CONJUNCTION_MAX_SEPARATION, moon_limit=MOON_APPROACH_MAX_SEPARATION):
+    """Conjunctions, close Moon approaches and oppositions between two dates.
+
+    `start` and `end` are dates or datetimes; whole UTC days are searched
+    and results are cached per day range and limits. All bodies are
+    sampled every EVENT_SAMPLE_HOURS over one Time array and every pair's
+    separation is one array operation; each sampled minimum or crossing is
+    then refined by vectorized bisection. Separations are geocentric
+    (from a topocentric view the Moon can be up to a degree off).
+
+    Returns dicts sorted by time: 'time' (UTC datetime), 'event', 'bodies'
+    (names), 'separation' (degrees, None for oppositions) and 'description'.
+    Raises ValueError if the range is outside the ephemeris.
+    """
+    first_day = start.date() if isinstance(start, datetime) else start
+    last_day = end.date() if isinstance(end, datetime) else end
+    key = (first_day, last_day, conjunction_limit, moon_limit)
+    events = _EVENT_CACHE.get(key)
+    if events is not None:
+        return events
+
+    from skyfield.api import load
+
+    ts = load.timescale()
+    t0 = ts.from_datetime(datetime.combine(first_day, dt_time(), timezone.utc))
+    t1 = ts.from_datetime(datetime.combine(last_day + timedelta(days=1), dt_time(), timezone.utc))
+    planets = get_ephemeris()
+    check_time_in_range(planets, t0)
+    check_time_in_range(planets, t1)
+    earth = planets['earth']
+    bodies = _event_bodies(planets)
+    # One extra sample before and after the range, so that minima and crossings at its
+    # very ends are still bracketed; events outside the range are dropped below
+    step = EVENT_SAMPLE_HOURS / 24
+    grid = np.arange(t0.tt - step, t1.tt + 2 * step, step)
+    first_jd, last_jd = ephemeris_date_range(planets)
+    grid = grid[(grid > first_jd + 2 * _DERIVATIVE_STEP_DAYS) & (grid < last_jd - 2 * _DERIVATIVE_STEP_DAYS)]
+
+    moon = next(i for i, body in enumerate(bodies) if body['kind'] == 'Moon')
+    planet_ids = [i for i, body in enumerate(bodies) if body['kind'] == 'Planet']
+    star_ids = [i for i, body in enumerate(bodies) if body['kind'] == 'Star']
+    pairs = [(a, b) for n, a in enumerate(planet_ids) for b in planet_ids[n + 1:]]
+    limits = [conjunction_limit] * len(pairs)
+    pairs += [(moon, b) for b in planet_ids + star_ids]
+    limits += [moon_limit] * (len(planet_ids) + len(star_ids))
+    pairs, limits = np.array(pairs, dtype=int).reshape(-1, 2), np.array(limits, dtype=np.float64)
+
+    events = []
+    pair, tt, separation = _closest_approaches(bodies, pairs, limits, grid, ts, earth)
+    for p, when, sep in zip(pair, ts.tt_jd(tt).utc_datetime() if len(tt) else [], separation):
+        a, b = (bodies[i]['name'] for i in pairs[p])
+        event = 'Moon approach' if bodies[pairs[p][0]]['kind'] == 'Moon' else 'Conjunction'
+        events.append({'time': when, 'event': event, 'bodies': (a, b), 'separation': round(float(sep), 2),
+                       'description': f"{a} {sep:.1f}° from {b}"})
+    planet, tt = _oppositions(bodies, grid, ts, earth)
+    for b, when in zip(planet, ts.tt_jd(tt).utc_datetime() if len(tt) else []):
+        name = bodies[b]['name']
+        events.append({'time': when, 'event': 'Opposition', 'bodies': (name,), 'separation': None,
+                       'description': f"{name} at opposition"})
+    start_dt = datetime.combine(first_day, dt_time(), timezone.utc)
+    end_dt = datetime.combine(last_day + timedelta(days=1), dt_time(), timezone.utc)
+    events = sorted((e for e in events if start_dt <= e['time'] < end_dt), key=lambda e: e['time'])
+
+    _EVENT_CACHE.put(key, events)
+    return events
@@ -0,0 +1,313 @@
+# load_test.py
+"""Simulates concurrent users and reports latency, throughput and memory growth.
+
+Each session picks a city, then keeps changing the location, moving the
+time, zooming the sky chart and viewing the tiles, one page per step.
+Wikipedia is replaced by a local stub with a configurable latency and
+error rate, so runs are repeatable and never touch the real service.
+
+    python load_test.py [--sessions 8] [--pages 10] [--processes 1] [--mode core|app]
+                        [--wiki-latency-ms 80] [--wiki-error-rate 0.02]
+
+--mode core calls get_visible_objects, enhance_visible_objects and
+create_sky_chart directly, as main.py does for one page. --mode app runs
+main.py headlessly with Streamlit's AppTest, one app session per simulated
+user. Sessions are threads, as they are in a Streamlit server; with
+--processes they are spread over several worker processes, each of which
+reports its own memory.
+"""
+import argparse
+import csv
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from multiprocessing import Pool
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+from location_utils import CITIES_PATH
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(_CURRENT_DIR, "main.py")
+
+ZOOM_LEVELS = [0.7, 1.0, 1.3, 1.6, 2.0]
+ACTIONS = ('location', 'time', 'zoom', 'view')
+STAGES = ('page', 'visible', 'tiles', 'chart')
+CITY_COUNT = 500  # sessions pick among the most populous cities
+
+
+def load_cities(path=CITIES_PATH, count=CITY_COUNT):
+    """(name, latitude, longitude) of the `count` most populous cities."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = sorted(csv.DictReader(f), key=lambda row: -int(row['population'] or 0))
+    return [(row['name'], float(row['latitude']), float(row['longitude'])) for row in rows[:count]]
+
+
+def current_rss_mib():
+    """Resident memory of this process in MiB (the peak, where the current value is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class StubWikipedia(http.server.ThreadingHTTPServer):
+    """Local stand-in for the REST summary and action API endpoints used by wiki_utils.
+
+    Every request waits `latency` seconds (jittered by +-50%) and fails with a
+    503 with probability `error_rate`. About one title in five has no article.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.08, error_rate=0.0, port=0):
+        super().__init__(('127.0.0.1', port), _StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.counts = {'requests': 0, 'errors': 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @staticmethod
+    def has_article(title):
+        return sum(map(ord, title)) % 5 != 0
+
+    @staticmethod
+    def record(title):
+        return {'title': title, 'extract': f"{title} is an object in the stub Wikipedia.",
+                'thumbnail': {'source': f"https://upload.example/{title.replace(' ', '_')}.jpg", 'width': 320, 'height': 240}}
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency * random.uniform(0.5, 1.5))
+        failed = random.random() < server.error_rate
+        with server.lock:
+            server.counts['requests'] += 1
+            server.counts['errors'] += failed
+        if failed:
+            return self._reply(503)
+        url = urlparse(self.path)
+        if url.path.startswith('/summary/'):
+            title = unquote(url.path[len('/summary/'):])
+            return self._reply(200, server.record(title)) if server.has_article(title) else self._reply(404)
+        titles = parse_qs(url.query).get('titles', [''])[0].split('|')
+        pages = [server.record(title) if server.has_article(title) else {'title': title, 'missing': True}
+                 for title in dict.fromkeys(titles)]
+        self._reply(200, {'batchcomplete': True, 'query': {'pages': pages}})
+
+
+def use_stub_wikipedia(base_url):
+    """Points wiki_utils at the stub server."""
+    from wiki_utils import WikiBackend, set_wiki_backend
+
+    set_wiki_backend(WikiBackend(summary_url=base_url + "/summary/{}", api_url=base_url + "/w/api.php"))
+
+
+class Session:
+    """One simulated user: a location, a time and a zoom level that change page by page."""
+
+    def __init__(self, rng, cities):
+        self.rng = rng
+        self.cities = cities
+        self.zoom = 1.0
+        self.when = datetime.now(timezone.utc).replace(microsecond=0)
+        self.move()
+
+    def move(self):
+        _, self.lat, self.lon = self.rng.choice(self.cities)
+
+    def step(self):
+        """Applies one random user action and returns its name."""
+        action = self.rng.choice(ACTIONS)
+        if action == 'location':
+            self.move()
+        elif action == 'time':
+            self.when += timedelta(hours=self.rng.uniform(-6, 6))
+        elif action == 'zoom':
+            idx = ZOOM_LEVELS.index(self.zoom) + self.rng.choice((-1, 1))
+            self.zoom = ZOOM_LEVELS[min(max(idx, 0), len(ZOOM_LEVELS) - 1)]
+        return action
+
+
+def core_page(session):
+    """What main.py does for one page, timed by stage (seconds)."""
+    from astro_utils import get_visible_objects
+    from skychart_utils import create_sky_chart
+    from tile_utils import enhance_visible_objects, select_tile_objects
+    from wiki_utils import get_object_image_url, start_page_budget
+
+    start_page_budget()
+    start = time.perf_counter()
+    visible = get_visible_objects(session.lat, session.lon, session.when, zoom=session.zoom)
+    after_visible = time.perf_counter()
+    tiles = enhance_visible_objects(select_tile_objects(visible))
+    for obj in tiles:
+        get_object_image_url(obj.get('wiki_title', obj['name']))
+    after_tiles = time.perf_counter()
+    figure = create_sky_chart(visible, session.lat, session.lon, session.when, zoom=session.zoom)
+    if figure is not None:
+        figure.to_json()  # st.plotly_chart serializes the figure the same way
+    end = time.perf_counter()
+    return {'page': end - start, 'visible': after_visible - start,
+            'tiles': after_tiles - after_visible, 'chart': end - after_tiles}
+
+
+def app_page(session, app, action):
+    """One rerun of main.py after the session's action, timed as a whole."""
+    app.session_state.latitude = session.lat
+    app.session_state.longitude = session.lon
+    app.session_state.user_selected_date = session.when.date()
+    app.session_state.user_selected_time = session.when.time()
+    if action == 'zoom':
+        label = "+ Zoom In" if app.session_state.sky_zoom < session.zoom else "- Zoom Out"
+        buttons = [b for b in app.button if b.label == label]
+        if buttons:
+            buttons[0].click()
+    start = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return {'page': time.perf_counter() - start}
+
+
+def run_session(seed, pages, mode, cities, results, errors):
+    rng = random.Random(seed)
+    session = Session(rng, cities)
+    app = None
+    if mode == 'app':
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(MAIN_PATH, default_timeout=600)
+        app.session_state.address = "Load test"
+    for page in range(pages):
+        action = session.step() if page else 'location'
+        try:
+            timings = core_page(session) if mode == 'core' else app_page(session, app, action)
+        except Exception as e:
+            errors.append(f"{action}: {e}")
+            continue
+        results.append((time.perf_counter(), timings))
+
+
+def run_process(args):
+    """Runs a share of the sessions in this process; returns timings and memory samples."""
+    from astro_utils import star_update_counts
+
+    worker, sessions, pages, mode, stub_url, seed, sample_seconds = args
+    use_stub_wikipedia(stub_url)
+    cities = load_cities()
+
+    # The first page loads the catalogs and the ephemeris; time it separately
+    warmup_start = time.perf_counter()
+    core_page(Session(random.Random(seed), cities))
+    warmup = time.perf_counter() - warmup_start
+
+    results, errors, samples = [], [], []
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def sample_memory():
+        while not done.is_set():
+            samples.append((time.perf_counter() - start, current_rss_mib()))
+            done.wait(sample_seconds)
+        samples.append((time.perf_counter() - start, current_rss_mib()))
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    threads = [threading.Thread(target=run_session, args=(seed * 1000 + worker * 100 + i, pages, mode, cities, results, errors))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return {'pid': os.getpid(), 'warmup': warmup, 'elapsed': elapsed, 'timings': [t for _, t in results],
+            'errors': errors, 'samples': samples, 'star_updates': star_update_counts()}
+
+
+def report(args, outcomes, stub, wall):
+    timings = [t for outcome in outcomes for t in outcome['timings']]
+    errors = [e for outcome in outcomes for e in outcome['errors']]
+    print(f"{args.sessions} sessions x {args.pages} pages, {args.mode} mode, {args.processes} process(es); "
+          f"Wikipedia stub {args.wiki_latency_ms:.0f} ms, {args.wiki_error_rate:.0%} errors")
+    print(f"  pages: {len(timings)} in {wall:.1f} s = {len(timings) / wall:.2f} pages/s"
+          + (f", {len(errors)} failed (first: {errors[0]})" if errors else ""))
+    print(f"  {'latency (ms)':<14}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    for stage in STAGES:
+        values = np.array([t[stage] for t in timings if stage in t]) * 1000
+        if len(values):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(f"  {stage:<14}{p50:8.0f}{p95:8.0f}{p99:8.0f}{values.max():8.0f}")
+    print("  memory (RSS MiB) per process:")
+    for outcome in outcomes:
+        samples = outcome['samples']
+        first, last = samples[0][1], samples[-1][1]
+        step = max(1, len(samples) // 6)
+        trace = ", ".join(f"{t:.0f}s {rss:.0f}" for t, rss in samples[::step])
+        print(f"    pid {outcome['pid']}: {first:.0f} -> {last:.0f} ({last - first:+.0f}) "
+              f"after a {outcome['warmup']:.1f} s warm-up; {trace}")
+    rotated = sum(outcome['star_updates']['rotated'] for outcome in outcomes)
+    full = sum(outcome['star_updates']['full'] for outcome in outcomes)
+    print(f"  star positions: {rotated} rotated from a reference epoch, {full} computed in full")
+    print(f"  Wikipedia stub: {stub.counts['requests']} requests, {stub.counts['errors']} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument('--pages', type=int, default=10, help="Pages each user views")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes sharing the sessions")
+    parser.add_argument('--mode', choices=('core', 'app'), default='core',
+                        help="Call the core functions directly, or run main.py with AppTest")
+    parser.add_argument('--wiki-latency-ms', type=float, default=80.0, help="Stub Wikipedia latency per request")
+    parser.add_argument('--wiki-error-rate', type=float, default=0.02, help="Share of stub requests answered with a 503")
+    parser.add_argument('--sample-seconds', type=float, default=1.0, help="Memory sampling interval")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    stub = StubWikipedia(args.wiki_latency_ms / 1000, args.wiki_error_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    shares = [args.sessions // args.processes + (i < args.sessions % args.processes) for i in range(args.processes)]
+    jobs = [(i, share, args.pages, args.mode, stub.base_url, args.seed, args.sample_seconds)
+            for i, share in enumerate(shares) if share]
+    if len(jobs) == 1:
+        outcomes = [run_process(jobs[0])]
+    else:
+        with Pool(len(jobs)) as pool:
+            outcomes = pool.map(run_process, jobs)
+    stub.shutdown()
+    report(args, outcomes, stub, max(outcome['elapsed'] for outcome in outcomes))
+
+
+if __name__ == '__main__':
+    main()
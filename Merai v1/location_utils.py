@@ -1,15 +1,105 @@
-import geocoder
-from skyfield.api import utc
-from datetime import datetime
+import csv
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bundled GeoNames extract: every city with population >= 15000 (CC-BY-4.0)
+CITIES_PATH = os.path.join(_CURRENT_DIR, "cities.csv")
+
+EARTH_RADIUS_KM = 6371.0
+# Beyond this the nearest city is not a useful label (open ocean, polar regions)
+MAX_CITY_DISTANCE_KM = 200.0
+# The IP lookup runs on the Streamlit script thread, so a slow network must not hold up the rerun
+IP_LOCATION_TIMEOUT_SECONDS = 3.0
+
+_CITY_INDEX = None
+
+
+def _unit_vectors(lat, lon):
+    """Latitude/longitude in degrees to unit vectors on the sphere, shape (..., 3)."""
+    phi, lam = np.radians(lat), np.radians(lon)
+    cos_phi = np.cos(phi)
+    return np.stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)), axis=-1)
+
+
+def load_city_index(file_path=CITIES_PATH):
+    """Loads the cities file into a KD-tree over unit vectors.
+
+    Euclidean (chord) distance on the unit sphere is monotonic in
+    great-circle distance, so the plain 3-D nearest neighbour is the
+    nearest city. Returns None if the file is missing.
+    """
+    from scipy.spatial import cKDTree
+
+    names, countries, lats, lons = [], [], [], []
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                names.append(row['name'])
+                countries.append(row['country'])
+                lats.append(float(row['latitude']))
+                lons.append(float(row['longitude']))
+    except FileNotFoundError:
+        print(f"Error: Cities file not found at {file_path}")
+        return None
+
+    return {
+        'name': np.array(names, dtype=object),
+        'country': np.array(countries, dtype=object),
+        'tree': cKDTree(_unit_vectors(np.array(lats), np.array(lons))),
+    }
+
+
+def get_city_index():
+    """Returns the city KD-tree, building it on first use."""
+    global _CITY_INDEX
+    if _CITY_INDEX is None:
+        _CITY_INDEX = load_city_index()
+    return _CITY_INDEX
+
+
+def nearest_city(lat, lon, max_distance_km=MAX_CITY_DISTANCE_KM):
+    """Returns (city, country, distance_km) for the closest city, or None."""
+    index = get_city_index()
+    if index is None:
+        return None
+    chord, i = index['tree'].query(_unit_vectors(lat, lon))
+    distance_km = 2.0 * EARTH_RADIUS_KM * np.arcsin(min(chord / 2.0, 1.0))
+    if distance_km > max_distance_km:
+        return None
+    return index['name'][i], index['country'][i], float(distance_km)
+
+
+def describe_location(lat, lon):
+    """Human-readable label such as 'Pune, India' or '25 km from Pune, India'."""
+    city = nearest_city(lat, lon)
+    if city is None:
+        return f"({lat:.2f}, {lon:.2f})"
+    name, country, distance_km = city
+    if distance_km < 10.0:
+        return f"{name}, {country}"
+    return f"{distance_km:.0f} km from {name}, {country}"
+
 
 def get_user_location():
-    g = geocoder.ip('me')
+    """(lat, lon, address) from an IP lookup, or (None, None, None) if it fails or
+    takes longer than IP_LOCATION_TIMEOUT_SECONDS; the caller keeps its current location."""
+    import geocoder  # deferred: pulls in requests and friends
+
+    try:
+        g = geocoder.ip('me', timeout=IP_LOCATION_TIMEOUT_SECONDS)
+    except Exception as e:  # geocoder catches request errors itself, but not everything
+        print(f"Error: IP location lookup failed: {e}")
+        return None, None, None
     if g.ok:
         lat, lon = g.latlng
-        address = g.city + ", " + g.country if g.city and g.country else "Unknown location"
+        address = g.city + ", " + g.country if g.city and g.country else describe_location(lat, lon)
         return lat, lon, address
     else:
         return None, None, None
 
 def get_user_datetime():
-    return datetime.now().replace(tzinfo=utc)
+    return datetime.now().replace(tzinfo=timezone.utc)
@@ -1,20 +1,27 @@
 import streamlit as st
-from datetime import date, datetime
-from skyfield.api import utc
-from streamlit_folium import st_folium
-from astro_utils import get_visible_objects
-from wiki_utils import get_object_image_url, get_object_description, extract_name_from_description
-from location_utils import get_user_location
-from constellation_utils import load_constellation_data
-from skychart_utils import create_sky_chart
-import folium
-
-# Load constellation data once at the start
-CONSTELLATION_MAP = load_constellation_data()
+from datetime import date, datetime, timedelta, timezone
+from astro_utils import get_visible_objects, get_satellite_passes, locate_object
+from dso_utils import DSO_MAG_LIMIT
+from visibility_utils import TWILIGHT_LIMITS, make_filters, parse_horizon_profile
+from wiki_utils import get_object_image_url, start_page_budget, circuit_open
+from tile_utils import enhance_visible_objects, select_tile_objects
+from name_utils import search_names
+from star_utils import get_star_catalog
+from location_utils import get_user_location, describe_location
+from skychart_utils import create_sky_chart, get_static_sky_chart
+from visibility_map_utils import add_visibility_overlay
+from event_utils import find_events
+
+# Heavy dependencies (Skyfield, folium, Plotly, BeautifulSoup, geocoder) and the
+# catalogs are loaded on first use, so the page starts rendering straight away.
+# Run check_import_time.py after changing the imports above.
 
 # Streamlit app configuration
 st.set_page_config(page_title="Merai - A Space Detective")
 
+# Every rerun gets a fresh, bounded allowance of time for Wikipedia lookups
+start_page_budget()
+
 # Immersive background and custom styles
 st.markdown(
     """
@@ -61,7 +68,12 @@ location_option = st.radio(
 
 if st.session_state.location_choice == "Detect my location":
     if st.button("Detect My Location Now"):
-        detected_lat, detected_lon, detected_address = get_user_location()
+        # The IP lookup is a network round trip, so a successful result is reused for the session
+        if 'ip_location' not in st.session_state:
+            ip_location = get_user_location()
+            if ip_location[0] is not None:
+                st.session_state.ip_location = ip_location
+        detected_lat, detected_lon, detected_address = st.session_state.get('ip_location', (None, None, None))
         if detected_lat is not None and detected_lon is not None:
             st.session_state.latitude = detected_lat
             st.session_state.longitude = detected_lon
@@ -71,11 +83,28 @@ if st.session_state.location_choice == "Detect my location":
             st.error("Could not automatically determine location. Please try selecting on the map.")
 elif st.session_state.location_choice == "Select location on map":
     st.subheader("Click on the map to set your location")
+    import folium
+    from streamlit_folium import st_folium
+
     map_center_lat = st.session_state.get('latitude', 0.0)
     map_center_lon = st.session_state.get('longitude', 0.0)
     m = folium.Map(location=[map_center_lat, map_center_lon], zoom_start=5)
     if st.session_state.address not in ["Not set", "Automatic Detection Failed"] and -90 <= st.session_state.latitude <= 90 and -180 <= st.session_state.longitude <= 180:
         folium.Marker([st.session_state.latitude, st.session_state.longitude], popup=st.session_state.address).add_to(m)
+    # Optional overlay: where on Earth an object is up at the date and time chosen below
+    overlay_query = st.text_input("Shade where an object is above the horizon", placeholder="e.g. Moon, Jupiter, Canopus", key="overlay_query")
+    if overlay_query:
+        overlay_matches = search_names(overlay_query, limit=1)
+        if overlay_matches:
+            overlay_dt = datetime.combine(st.session_state.get('user_selected_date', date.today()),
+                                          st.session_state.get('user_selected_time', datetime.now().time())).replace(tzinfo=timezone.utc)
+            try:
+                if add_visibility_overlay(m, overlay_matches[0], overlay_dt):
+                    st.caption(f"Shaded where {overlay_matches[0]['name']} is above the horizon at {overlay_dt:%Y-%m-%d %H:%M} UTC; redder means higher in the sky.")
+            except ValueError as e:
+                st.error(f"Cannot compute positions for this date: {e}")
+        else:
+            st.warning(f"No catalogued object matches '{overlay_query}'.")
     map_data = st_folium(m, height=400, use_container_width=True, key="folium_map_selector")
     if map_data and map_data["last_clicked"]:
         clicked_lat = map_data['last_clicked']['lat']
@@ -83,7 +112,7 @@ elif st.session_state.location_choice == "Select location on map":
         if st.session_state.latitude != clicked_lat or st.session_state.longitude != clicked_lon:
             st.session_state.latitude = clicked_lat
             st.session_state.longitude = clicked_lon
-            st.session_state.address = f"Map Selected: ({clicked_lat:.2f}, {clicked_lon:.2f})"
+            st.session_state.address = f"Map Selected: {describe_location(clicked_lat, clicked_lon)}"
 
 if st.session_state.address not in ["Not set", "Automatic Detection Failed"]:
     st.success(f"Using location: {st.session_state.address} ({st.session_state.latitude:.2f}, {st.session_state.longitude:.2f})")
@@ -97,36 +126,11 @@ if 'user_selected_time' not in st.session_state:
 
 d = st.date_input("Date", key="user_selected_date")
 t = st.time_input("Time", key="user_selected_time")
-dt = datetime.combine(st.session_state.user_selected_date, st.session_state.user_selected_time).replace(tzinfo=utc)
-
-# Helper function to clean and enhance visible objects
-def enhance_visible_objects(visible_objects, constellation_map):
-    enhanced_objects = []
-    for obj in visible_objects:
-        original_astro_name = obj['name']
-        hip_id = obj.get('hip_id')
-        description_lookup_key = hip_id if obj['type'] == 'Star' and hip_id else original_astro_name
-        description = get_object_description(description_lookup_key)
-
-        if obj['type'] == 'Star':
-            name_from_desc = extract_name_from_description(description) if description else None
-            if name_from_desc:
-                obj['name'] = name_from_desc
-        else:
-            name_from_desc = None
+dt = datetime.combine(st.session_state.user_selected_date, st.session_state.user_selected_time).replace(tzinfo=timezone.utc)
 
-        obj['fetched_description'] = description
-        obj['name_extracted_from_description_for_tile_h1'] = name_from_desc
-
-        if obj['type'] == 'Star':
-            hip_int_for_lookup = obj.get('hip_int')
-            if hip_int_for_lookup and constellation_map:
-                obj['constellation'] = constellation_map.get(hip_int_for_lookup, "Unknown")
-        else:
-            obj['constellation'] = "N/A"
-
-        enhanced_objects.append(obj)
-    return enhanced_objects
+# Columns written by the "Download as CSV" button, when present
+EXPORT_COLUMNS = ['name', 'type', 'altitude', 'azimuth', 'magnitude', 'constellation',
+                  'designation', 'dso_type', 'size_arcmin', 'hip_id', 'range_km']
 
 # Helper function to create tiles for objects
 def create_object_tiles(objects):
@@ -135,12 +139,17 @@ def create_object_tiles(objects):
     TILE_HEIGHT = 550
     for idx, obj_data in enumerate(objects):
         with cols[idx % 3]:
-            display_name_h1 = obj_data['name_extracted_from_description_for_tile_h1'] if obj_data['name_extracted_from_description_for_tile_h1'] else obj_data['name']
-            display_name_h2 = obj_data.get('hip_id', '') if obj_data['type'] == 'Star' else ''
-            description_for_tile = obj_data['fetched_description']
+            display_name_h1 = obj_data.get('name_extracted_from_description_for_tile_h1') or obj_data['name']
+            if obj_data['type'] == 'Star':
+                display_name_h2 = obj_data.get('hip_id', '')
+            elif obj_data['type'] == 'Deep Sky':
+                display_name_h2 = f"{obj_data['designation']} · {obj_data['dso_type']}"
+            else:
+                display_name_h2 = ''
+            description_for_tile = obj_data.get('fetched_description')
             constellation_name_for_tile = obj_data.get('constellation', "N/A")
 
-            image_lookup_key = obj_data['name']
+            image_lookup_key = obj_data.get('wiki_title', obj_data['name'])
             image_url = get_object_image_url(image_lookup_key)
 
             image_html_part = f"<img src='{image_url}' style='width:100%;height:180px;object-fit:cover;border-top-left-radius:16px;border-top-right-radius:16px;margin-bottom:0;' alt='object image' />" if image_url else "<div style='width:100%;height:180px;display:flex;align-items:center;justify-content:center;background:#333;border-top-left-radius:16px;border-top-right-radius:16px;color:#ff6666;font-size:18px;'>No image found.</div>"
@@ -173,41 +182,160 @@ def create_object_tiles(objects):
                 with st.expander("Know more"):
                     st.markdown(f"<h4 style='color:#bbb;font-size:1em;margin:0;'>{description_for_tile}</h4>", unsafe_allow_html=True)
 
+# Name search: "where is it now" for any catalogued object
+st.header("Find an Object")
+object_query = st.text_input("Name or designation", placeholder="e.g. Vega, Alpha Lyr, M31, NGC 7000, Jupiter, HIP 91262", key="object_query")
+if object_query:
+    matches = search_names(object_query)
+    if not matches:
+        st.warning(f"No catalogued object matches '{object_query}'.")
+    else:
+        labels = [f"{m['name']} ({m['type']})" for m in matches]
+        chosen = st.selectbox("Matches", range(len(matches)), format_func=labels.__getitem__, key="object_match")
+        try:
+            position = locate_object(matches[chosen], st.session_state.latitude, st.session_state.longitude, dt)
+        except ValueError as e:
+            position = None
+            st.error(f"Cannot compute positions for this date: {e}")
+        if position:
+            where = f"altitude {position['altitude']}°, azimuth {position['azimuth']}°"
+            if position['above_horizon']:
+                st.success(f"{position['name']} is above the horizon at {where}.")
+            else:
+                st.info(f"{position['name']} is below the horizon ({where}).")
+
+# Deep-sky object filters
+st.header("Deep-Sky Objects")
+dso_col1, dso_col2 = st.columns(2)
+dso_mag_limit = dso_col1.slider("Faintest magnitude", min_value=1.0, max_value=14.0, value=DSO_MAG_LIMIT, step=0.5, key="dso_mag_limit")
+dso_min_size = dso_col2.slider("Minimum size (arcmin)", min_value=0.0, max_value=60.0, value=0.0, step=1.0, key="dso_min_size")
+
+# Visibility filters, applied as array masks inside get_visible_objects
+with st.expander("Visibility Filters"):
+    vis_col1, vis_col2 = st.columns(2)
+    min_altitude = vis_col1.slider("Minimum altitude (°)", min_value=0.0, max_value=60.0, value=0.0, step=1.0, key="min_altitude")
+    twilight = vis_col2.selectbox("Only when the Sun is below", ["Any time"] + [f"{name} twilight ({limit:.0f}°)" for name, limit in TWILIGHT_LIMITS.items()], key="twilight")
+    moon_separation = vis_col1.slider("Minimum distance from the Moon (°)", min_value=0.0, max_value=90.0, value=0.0, step=5.0, key="min_moon_separation")
+    limit_magnitude = vis_col2.checkbox("Limit magnitude", key="limit_magnitude")
+    max_magnitude = vis_col2.slider("Faintest magnitude (all objects)", min_value=-2.0, max_value=15.0, value=6.0, step=0.5, key="max_magnitude", disabled=not limit_magnitude)
+    horizon_text = st.text_area("Local horizon (azimuth:altitude points)", placeholder="e.g. 0:5, 90:25, 180:10, 270:15", key="horizon_profile")
+try:
+    horizon_profile = parse_horizon_profile(horizon_text)
+except ValueError as e:
+    st.error(f"Ignoring horizon profile: {e}")
+    horizon_profile = None
+visibility_filters = make_filters(
+    min_altitude=min_altitude,
+    horizon_profile=horizon_profile,
+    max_sun_altitude=None if twilight == "Any time" else TWILIGHT_LIMITS[twilight.split()[0]],
+    min_moon_separation=moon_separation or None,
+    max_magnitude=max_magnitude if limit_magnitude else None,
+)
+
+# Sky chart zoom; the star level of detail follows it, so it is read before fetching
+ZOOM_LEVELS = [0.7, 1.0, 1.3, 1.6, 2.0]
+if 'sky_zoom' not in st.session_state:
+    st.session_state.sky_zoom = 1.0
+
+def step_sky_zoom(step):
+    idx = ZOOM_LEVELS.index(st.session_state.sky_zoom) if st.session_state.sky_zoom in ZOOM_LEVELS else 1
+    st.session_state.sky_zoom = ZOOM_LEVELS[min(max(idx + step, 0), len(ZOOM_LEVELS) - 1)]
+
 # Fetch and display astronomical objects
 st.header("Visible Astronomical Objects")
 with st.spinner("Fetching visible astronomical objects and details..."):
     # Ensure latitude and longitude are passed to `get_visible_objects`
-    visible_objects = get_visible_objects(st.session_state.latitude, st.session_state.longitude, dt)
+    try:
+        visible_objects = get_visible_objects(st.session_state.latitude, st.session_state.longitude, dt,
+                                              dso_mag_limit=dso_mag_limit, dso_min_size=dso_min_size,
+                                              filters=visibility_filters, zoom=st.session_state.sky_zoom)
+    except ValueError as e:
+        st.error(f"Cannot compute positions for this date: {e}")
+        st.stop()
     if not visible_objects:
         st.warning("No astronomical objects are currently visible from your location.")
         st.stop()
-    enhanced_objects = enhance_visible_objects(visible_objects, CONSTELLATION_MAP)
+    enhanced_objects = enhance_visible_objects(select_tile_objects(visible_objects))
+    if circuit_open():
+        st.info("Wikipedia is not responding, so descriptions and images are skipped for now.")
     create_object_tiles(enhanced_objects)
+    export_columns = [c for c in EXPORT_COLUMNS if c in visible_objects]
+    st.download_button("Download as CSV", visible_objects.to_csv(export_columns),
+                       file_name="visible_objects.csv", mime="text/csv")
 
 # Sky chart section
 st.header("Sky Chart")
-zoom_levels = [0.7, 1.0, 1.3, 1.6, 2.0]
-if 'sky_zoom' not in st.session_state:
-    st.session_state.sky_zoom = 1.0
 col1, col2, col3 = st.columns([1, 2, 1])
 with col1:
-    if st.button("- Zoom Out"):
-        idx = zoom_levels.index(st.session_state.sky_zoom) if st.session_state.sky_zoom in zoom_levels else 1
-        if idx > 0:
-            st.session_state.sky_zoom = zoom_levels[idx-1]
+    st.button("- Zoom Out", on_click=step_sky_zoom, args=(-1,))
 with col3:
-    if st.button("+ Zoom In"):
-        idx = zoom_levels.index(st.session_state.sky_zoom) if st.session_state.sky_zoom in zoom_levels else 1
-        if idx < len(zoom_levels)-1:
-            st.session_state.sky_zoom = zoom_levels[idx+1]
+    st.button("+ Zoom In", on_click=step_sky_zoom, args=(1,))
+with col2:
+    static_chart = st.checkbox("Static image (lighter on slow devices)", key="static_sky_chart")
 if visible_objects:
     chart_lat = st.session_state.get('latitude', 0.0)
     chart_lon = st.session_state.get('longitude', 0.0)
+    star_catalog = get_star_catalog()
+    star_mag_limit = star_catalog.magnitude_limit(star_catalog.level_of_detail(st.session_state.sky_zoom))
+    col2.caption(f"Zoom {st.session_state.sky_zoom:g}x: stars down to magnitude {star_mag_limit:.1f}")
     with st.spinner("Generating Sky Chart..."):
-        sky_chart_figure = create_sky_chart(visible_objects, chart_lat, chart_lon, dt, zoom=st.session_state.sky_zoom)
-        if sky_chart_figure:
-            st.plotly_chart(sky_chart_figure, use_container_width=True)
+        if static_chart:
+            # Rendered server-side and cached per rounded location, time and zoom
+            chart_png = get_static_sky_chart(chart_lat, chart_lon, dt, zoom=st.session_state.sky_zoom,
+                                             dso_mag_limit=dso_mag_limit, dso_min_size=dso_min_size,
+                                             filters=visibility_filters)
+            if chart_png:
+                st.image(chart_png, use_container_width=True)
+                st.download_button("Download chart as PNG", chart_png, file_name="sky_chart.png", mime="image/png")
+            else:
+                st.warning("Could not generate the sky chart at this time.")
         else:
-            st.warning("Could not generate the sky chart at this time.")
+            sky_chart_figure = create_sky_chart(visible_objects, chart_lat, chart_lon, dt, zoom=st.session_state.sky_zoom)
+            if sky_chart_figure:
+                st.plotly_chart(sky_chart_figure, use_container_width=True)
+            else:
+                st.warning("Could not generate the sky chart at this time.")
 else:
     st.info("No objects visible to display on sky chart.")
+
+# Satellite pass predictions from the local TLE file
+st.header("Satellite Passes")
+pass_col1, pass_col2 = st.columns([2, 1])
+pass_filter = pass_col1.text_input("Satellite name contains", value="ISS", key="satellite_pass_filter")
+pass_hours = pass_col2.selectbox("Look ahead (hours)", [6, 12, 24], index=1, key="satellite_pass_hours")
+if st.button("Predict Passes"):
+    with st.spinner("Propagating satellites..."):
+        passes = get_satellite_passes(st.session_state.latitude, st.session_state.longitude, dt,
+                                      hours=pass_hours, name_filter=pass_filter.strip() or None)
+    if passes:
+        st.dataframe([{
+            'Satellite': p['name'],
+            'Rise (UTC)': p['rise_time'].utc_strftime('%Y-%m-%d %H:%M:%S'),
+            'Max Altitude (°)': p['max_altitude'],
+            'Culmination (UTC)': p['culmination_time'].utc_strftime('%H:%M:%S'),
+            'Set (UTC)': p['set_time'].utc_strftime('%H:%M:%S'),
+            'Sunlit': "Yes" if p['sunlit_at_peak'] else "No",
+        } for p in passes[:200]], use_container_width=True)
+    else:
+        st.info("No passes found. Make sure satellites.tle is present next to the app.")
+
+st.header("Upcoming Events")
+EVENT_SPANS = {"1 month": 31, "3 months": 92, "1 year": 365}
+event_span = st.selectbox("Search from the selected date for", list(EVENT_SPANS), index=2, key="event_span")
+if st.button("Find Events"):
+    event_start = st.session_state.user_selected_date
+    try:
+        with st.spinner("Searching for conjunctions and oppositions..."):
+            events = find_events(event_start, event_start + timedelta(days=EVENT_SPANS[event_span] - 1))
+    except ValueError as e:
+        st.error(str(e))
+        events = None
+    if events:
+        st.dataframe([{
+            'Time (UTC)': e['time'].strftime('%Y-%m-%d %H:%M'),
+            'Event': e['event'],
+            'Description': e['description'],
+            'Separation (°)': e['separation'],
+        } for e in events], use_container_width=True)
+    elif events is not None:
+        st.info("No events found in this range.")
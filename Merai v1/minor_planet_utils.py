@@ -0,0 +1,266 @@
+# minor_planet_utils.py
+import os
+
+import numpy as np
+
+from table_utils import ObjectTable
+from visibility_utils import visibility_mask
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local Minor Planet Center element files (MPCORB.DAT or an extract, and CometEls.txt)
+MPCORB_PATH = os.path.join(_CURRENT_DIR, "MPCORB.DAT")
+COMET_ELEMENTS_PATH = os.path.join(_CURRENT_DIR, "CometEls.txt")
+
+# Only bodies predicted brighter than this get a full apparent-position computation
+MINOR_PLANET_MAG_LIMIT = 10.0
+MAX_VISIBLE_MINOR_PLANETS = 30
+
+_GAUSS_K = 0.01720209895  # Gaussian gravitational constant, rad/day
+_OBLIQUITY_J2000 = np.radians(23.4392911)
+
+_MINOR_PLANETS = None
+_COMETS = None
+
+
+def _unpack_epoch(packed):
+    """MPC packed epoch ('K24AH') to a TT Julian date."""
+    from skyfield.timelib import julian_day
+
+    def n(c):
+        return ord(c) - (48 if c.isdigit() else 55)
+    year = 100 * n(packed[0]) + int(packed[1:3])
+    return julian_day(year, n(packed[3]), n(packed[4])) - 0.5
+
+
+def load_minor_planets(file_path=MPCORB_PATH):
+    """Loads MPCORB-format asteroid elements into parallel NumPy columns.
+
+    Elements are converted to perihelion form (q, e, i, node, peri, tp) so
+    asteroids and comets share one propagator. The parsed dataframe is kept
+    under 'rows' for building exact Skyfield orbits of the survivors.
+    """
+    from skyfield.data import mpc
+
+    try:
+        with open(file_path, 'rb') as f:
+            df = mpc.load_mpcorb_dataframe(f)
+    except FileNotFoundError:
+        print(f"Note: No MPCORB file found at {file_path}; asteroids disabled.")
+        return _empty_elements()
+    except Exception as e:
+        print(f"An unexpected error occurred while reading {file_path}: {e}")
+        return _empty_elements()
+
+    df = df.dropna(subset=['semimajor_axis_au', 'eccentricity', 'epoch_packed'])
+    df = df[df['eccentricity'] < 1.0].reset_index(drop=True)
+    epochs = df['epoch_packed'].map({p: _unpack_epoch(p) for p in df['epoch_packed'].unique()})
+
+    a = df['semimajor_axis_au'].to_numpy(dtype=np.float64)
+    e = df['eccentricity'].to_numpy(dtype=np.float64)
+    n = np.radians(df['mean_daily_motion_degrees'].to_numpy(dtype=np.float64))
+    mean_anomaly = np.radians(df['mean_anomaly_degrees'].to_numpy(dtype=np.float64))
+    return {
+        'name': df['designation'].astype(str).str.strip().to_numpy(dtype=object),
+        'type': 'Asteroid',
+        'q': a * (1.0 - e),
+        'e': e,
+        'i': np.radians(df['inclination_degrees'].to_numpy(dtype=np.float64)),
+        'node': np.radians(df['longitude_of_ascending_node_degrees'].to_numpy(dtype=np.float64)),
+        'peri': np.radians(df['argument_of_perihelion_degrees'].to_numpy(dtype=np.float64)),
+        'tp': epochs.to_numpy(dtype=np.float64) - mean_anomaly / n,
+        'mag_h': df['magnitude_H'].fillna(99.0).to_numpy(dtype=np.float64),
+        'mag_slope': df['magnitude_G'].fillna(0.15).to_numpy(dtype=np.float64),
+        'rows': df,
+    }
+
+
+def load_comets(file_path=COMET_ELEMENTS_PATH):
+    """Loads CometEls.txt elements into the same columnar form as asteroids."""
+    from skyfield.data import mpc
+    from skyfield.timelib import julian_day
+
+    try:
+        with open(file_path, 'rb') as f:
+            df = mpc.load_comets_dataframe(f)
+    except FileNotFoundError:
+        print(f"Note: No comet elements file found at {file_path}; comets disabled.")
+        return _empty_elements()
+    except Exception as e:
+        print(f"An unexpected error occurred while reading {file_path}: {e}")
+        return _empty_elements()
+
+    df = df.dropna(subset=['perihelion_distance_au', 'eccentricity']).reset_index(drop=True)
+    day = df['perihelion_day'].to_numpy(dtype=np.float64)
+    tp = julian_day(df['perihelion_year'].to_numpy(dtype=np.int64),
+                    df['perihelion_month'].to_numpy(dtype=np.int64), 0) + day - 0.5
+    return {
+        'name': df['designation'].astype(str).str.strip().to_numpy(dtype=object),
+        'type': 'Comet',
+        'q': df['perihelion_distance_au'].to_numpy(dtype=np.float64),
+        'e': df['eccentricity'].to_numpy(dtype=np.float64),
+        'i': np.radians(df['inclination_degrees'].to_numpy(dtype=np.float64)),
+        'node': np.radians(df['longitude_of_ascending_node_degrees'].to_numpy(dtype=np.float64)),
+        'peri': np.radians(df['argument_of_perihelion_degrees'].to_numpy(dtype=np.float64)),
+        'tp': tp,
+        'mag_h': df['magnitude_g'].fillna(99.0).to_numpy(dtype=np.float64),
+        'mag_slope': df['magnitude_k'].fillna(4.0).to_numpy(dtype=np.float64),
+        'rows': df,
+    }
+
+
+def _empty_elements():
+    empty = np.zeros(0)
+    return {'name': np.zeros(0, dtype=object), 'type': None, 'q': empty, 'e': empty,
+            'i': empty, 'node': empty, 'peri': empty, 'tp': empty,
+            'mag_h': empty, 'mag_slope': empty, 'rows': None}
+
+
+def get_minor_planets():
+    """Returns the asteroid elements, loading them on first use."""
+    global _MINOR_PLANETS
+    if _MINOR_PLANETS is None:
+        _MINOR_PLANETS = load_minor_planets()
+    return _MINOR_PLANETS
+
+
+def get_comets():
+    """Returns the comet elements, loading them on first use."""
+    global _COMETS
+    if _COMETS is None:
+        _COMETS = load_comets()
+    return _COMETS
+
+
+def heliocentric_positions(elements, jd_tt):
+    """Two-body heliocentric ICRF positions (au), shape (n, 3), at one TT date.
+
+    Elliptic, parabolic and hyperbolic orbits are solved together with
+    masked Newton iterations, so tens of thousands of bodies cost a handful
+    of array passes. Perturbations and light time are ignored; this is a
+    prefilter, not the final position.
+    """
+    q, e = elements['q'], elements['e']
+    dt = jd_tt - elements['tp']
+    x = np.empty_like(q)
+    y = np.empty_like(q)
+
+    ell = e < 0.999
+    if ell.any():
+        a = q[ell] / (1.0 - e[ell])
+        m = np.remainder(_GAUSS_K * dt[ell] / a ** 1.5 + np.pi, 2 * np.pi) - np.pi
+        ecc = e[ell]
+        E = np.where(ecc > 0.8, np.pi * np.sign(m), m)
+        for _ in range(30):
+            E -= (E - ecc * np.sin(E) - m) / (1.0 - ecc * np.cos(E))
+        x[ell] = a * (np.cos(E) - ecc)
+        y[ell] = a * np.sqrt(1.0 - ecc * ecc) * np.sin(E)
+
+    hyp = e > 1.001
+    if hyp.any():
+        a = q[hyp] / (e[hyp] - 1.0)
+        m = _GAUSS_K * dt[hyp] / a ** 1.5
+        ecc = e[hyp]
+        H = np.arcsinh(m / ecc)
+        for _ in range(50):
+            H -= (ecc * np.sinh(H) - H - m) / (ecc * np.cosh(H) - 1.0)
+        x[hyp] = a * (ecc - np.cosh(H))
+        y[hyp] = a * np.sqrt(ecc * ecc - 1.0) * np.sinh(H)
+
+    par = ~(ell | hyp)
+    if par.any():
+        # Barker's equation; near-parabolic orbits are close enough for a prefilter
+        w = 3.0 * _GAUSS_K * dt[par] / np.sqrt(2.0 * q[par] ** 3)
+        root = np.cbrt(w / 2.0 + np.sqrt(w * w / 4.0 + 1.0))
+        s = root - 1.0 / root
+        x[par] = q[par] * (1.0 - s * s)
+        y[par] = 2.0 * q[par] * s
+
+    # Orbital plane -> ecliptic J2000 -> equatorial (ICRF)
+    cw, sw = np.cos(elements['peri']), np.sin(elements['peri'])
+    cn, sn = np.cos(elements['node']), np.sin(elements['node'])
+    ci, si = np.cos(elements['i']), np.sin(elements['i'])
+    xe = (cw * cn - sw * sn * ci) * x + (-sw * cn - cw * sn * ci) * y
+    ye = (cw * sn + sw * cn * ci) * x + (-sw * sn + cw * cn * ci) * y
+    ze = (sw * si) * x + (cw * si) * y
+    ce, se = np.cos(_OBLIQUITY_J2000), np.sin(_OBLIQUITY_J2000)
+    return np.column_stack((xe, ce * ye - se * ze, se * ye + ce * ze))
+
+
+def predicted_magnitudes(elements, jd_tt, earth_helio_au):
+    """Apparent magnitudes from two-body positions, vectorized over all bodies.
+
+    Asteroids use the IAU H-G system; comets use g + 5 log(delta) + 2.5 k log(r).
+    """
+    if len(elements['q']) == 0:
+        return np.zeros(0)
+    helio = heliocentric_positions(elements, jd_tt)
+    r = np.linalg.norm(helio, axis=1)
+    delta = np.linalg.norm(helio - earth_helio_au, axis=1)
+    if elements['type'] == 'Comet':
+        return elements['mag_h'] + 5.0 * np.log10(delta) + 2.5 * elements['mag_slope'] * np.log10(r)
+
+    earth_r = np.linalg.norm(earth_helio_au)
+    cos_phase = np.clip((r * r + delta * delta - earth_r * earth_r) / (2.0 * r * delta), -1.0, 1.0)
+    tan_half = np.tan(np.arccos(cos_phase) / 2.0)
+    phi1 = np.exp(-3.33 * tan_half ** 0.63)
+    phi2 = np.exp(-1.87 * tan_half ** 1.22)
+    g = elements['mag_slope']
+    phase_term = np.maximum((1.0 - g) * phi1 + g * phi2, 1e-12)
+    return elements['mag_h'] + 5.0 * np.log10(r * delta) - 2.5 * np.log10(phase_term)
+
+
+def _skyfield_orbit(elements, idx, ts):
+    from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+    from skyfield.data import mpc
+
+    row = elements['rows'].iloc[idx]
+    if elements['type'] == 'Comet':
+        return mpc.comet_orbit(row, ts, GM_SUN)
+    return mpc.mpcorb_orbit(row, ts, GM_SUN)
+
+
+def get_visible_minor_planets(observer, t, planets, mag_limit=MINOR_PLANET_MAG_LIMIT,
+                              max_results=MAX_VISIBLE_MINOR_PLANETS, filters=None, conditions=None):
+    """ObjectTable of asteroids and comets brighter than `mag_limit` that pass the filters.
+
+    The magnitude prefilter runs over every loaded body at once; only the
+    brightest `max_results` candidates get an exact Skyfield apparent position.
+    """
+    from skyfield.api import load
+
+    ts = load.timescale()
+    sun = planets['sun']
+    earth_helio = (planets['earth'].at(t) - sun.at(t)).position.au
+    groups = []
+    for elements in (get_minor_planets(), get_comets()):
+        if len(elements['q']) == 0:
+            continue
+        mags = predicted_magnitudes(elements, t.tt, earth_helio)
+        candidates = np.flatnonzero(mags <= mag_limit)
+        candidates = candidates[np.argsort(mags[candidates])][:max_results]
+        alts = np.full(len(candidates), np.nan)
+        azs = np.full(len(candidates), np.nan)
+        for k, idx in enumerate(candidates):
+            try:
+                body = sun + _skyfield_orbit(elements, idx, ts)
+                alt, az, _ = observer.at(t).observe(body).apparent().altaz()
+            except Exception as e:
+                print(f"Could not process {elements['name'][idx]}: {e}")
+                continue
+            alts[k], azs[k] = alt.degrees, az.degrees
+        keep = visibility_mask(alts, azs, mags[candidates], filters, conditions)
+        names = elements['name'][candidates[keep]]
+        if elements['type'] == 'Asteroid':
+            wiki_titles = np.array([name.replace('(', '').replace(')', '') for name in names], dtype=object)
+        else:
+            wiki_titles = names
+        groups.append(ObjectTable(
+            name=names,
+            wiki_title=wiki_titles,
+            type=elements['type'],
+            magnitude=mags[candidates[keep]].round(1),
+            altitude=alts[keep],
+            azimuth=azs[keep],
+        ))
+    return ObjectTable.concat(groups)
@@ -0,0 +1,227 @@
+# name_utils.py
+import csv
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from constellation_utils import CONSTELLATION_FILE_PATH
+from dso_utils import get_dso_catalog, dso_display_name
+from ephemeris_utils import SOLAR_SYSTEM_BODIES
+
+# Star names come from the same HYG file as the constellation data
+HYG_PATH = CONSTELLATION_FILE_PATH
+
+# Prefix matches examined before ranking; keeps "h" or "ngc" queries bounded
+PREFIX_SCAN_LIMIT = 500
+FUZZY_MAX_DISTANCE = 2
+
+GREEK_LETTERS = {
+    "Alp": "Alpha", "Bet": "Beta", "Gam": "Gamma", "Del": "Delta", "Eps": "Epsilon",
+    "Zet": "Zeta", "Eta": "Eta", "The": "Theta", "Iot": "Iota", "Kap": "Kappa",
+    "Lam": "Lambda", "Mu": "Mu", "Nu": "Nu", "Xi": "Xi", "Omi": "Omicron", "Pi": "Pi",
+    "Rho": "Rho", "Sig": "Sigma", "Tau": "Tau", "Ups": "Upsilon", "Phi": "Phi",
+    "Chi": "Chi", "Psi": "Psi", "Ome": "Omega",
+}
+
+# HYG 'bf' field: optional Flamsteed number, optional Greek letter (+ component), constellation
+_BF_PATTERN = re.compile(r"^(\d*)([A-Z][a-z]{1,2})?(\d?)\s*([A-Z][A-Za-z]{2})$")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+_NAME_INDEX = None
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def normalize_name(text):
+    """Lower-case and drop spaces/punctuation, so 'M 31', 'm31' and 'M-31' agree."""
+    return _NON_ALNUM.sub("", text.lower())
+
+
+def _bayer_flamsteed_names(bf):
+    """('Alpha Lyr', ['Alpha Lyr', 'Alp Lyr', '3 Lyr']) for an HYG bf value, or (None, [])."""
+    match = _BF_PATTERN.match(bf.strip())
+    if not match:
+        return None, []
+    flamsteed, greek, component, con = match.groups()
+    names = []
+    if greek and greek in GREEK_LETTERS:
+        names.append(f"{GREEK_LETTERS[greek]}{component} {con}")
+        names.append(f"{greek}{component} {con}")
+    if flamsteed:
+        names.append(f"{flamsteed} {con}")
+    return (names[0] if names else None), names
+
+
+def _char_histograms(keys):
+    """Per-key character counts over the normalized alphabet, shape (n, 36)."""
+    counts = np.zeros((len(keys), len(_ALPHABET)), dtype=np.int16)
+    lookup = {c: i for i, c in enumerate(_ALPHABET)}
+    for row, key in enumerate(keys):
+        for c in key:
+            counts[row, lookup[c]] += 1
+    return counts
+
+
+def load_name_index(hyg_path=HYG_PATH):
+    """Builds the offline name index.
+
+    Every object gets a row in parallel columns (name, type, ra_hours,
+    dec_degrees, magnitude, body). Aliases are normalized and kept in one
+    sorted list, so a prefix is a bisect plus a short scan. Fuzzy lookup
+    only considers real names (not bare HIP numbers) and is bucketed by
+    key length, since an edit distance <= k implies a length difference <= k.
+    """
+    names, types, ra, dec, mags, bodies = [], [], [], [], [], []
+    aliases = []  # (normalized key, object id, fuzzy-searchable)
+    hip_to_id = {}
+
+    def add_object(name, obj_type, ra_hours=np.nan, dec_degrees=np.nan, magnitude=np.nan, body=None):
+        names.append(name)
+        types.append(obj_type)
+        ra.append(ra_hours)
+        dec.append(dec_degrees)
+        mags.append(magnitude)
+        bodies.append(body)
+        return len(names) - 1
+
+    for pretty_name, obj_type, candidates in SOLAR_SYSTEM_BODIES:
+        oid = add_object(pretty_name, obj_type, body=candidates)
+        aliases.append((normalize_name(pretty_name), oid, True))
+
+    try:
+        with open(hyg_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                hip = int(float(row['hip'])) if row.get('hip') else 0
+                proper = (row.get('proper') or '').strip()
+                bayer, bf_names = _bayer_flamsteed_names(row.get('bf') or '')
+                if not (hip or proper or bf_names) or proper == 'Sol':
+                    continue
+                display = proper or bayer or (bf_names[0] if bf_names else f"HIP {hip}")
+                try:
+                    magnitude = float(row['mag'])
+                except (KeyError, ValueError):
+                    magnitude = np.nan
+                oid = add_object(display, 'Star', float(row['ra']), float(row['dec']), magnitude)
+                if proper:
+                    aliases.append((normalize_name(proper), oid, True))
+                for alias in bf_names:
+                    aliases.append((normalize_name(alias), oid, True))
+                if hip:
+                    hip_to_id[hip] = oid
+                    aliases.append((f"hip{hip}", oid, False))
+    except FileNotFoundError:
+        print(f"Error: HYG star catalog not found at {hyg_path}")
+
+    dsos = get_dso_catalog()
+    for idx in range(len(dsos['designation'])):
+        oid = add_object(dso_display_name(dsos, idx), 'Deep Sky', float(dsos['ra_hours'][idx]),
+                         float(dsos['dec_degrees'][idx]), float(dsos['magnitude'][idx]))
+        for alias in (dsos['designation'][idx], dsos['catalog_name'][idx], dsos['common_name'][idx]):
+            if alias:
+                aliases.append((normalize_name(alias), oid, True))
+
+    aliases = sorted(set(aliases))
+    fuzzy_buckets = {}
+    for key, oid, fuzzy in aliases:
+        if fuzzy:
+            bucket = fuzzy_buckets.setdefault(len(key), ([], []))
+            bucket[0].append(key)
+            bucket[1].append(oid)
+    magnitudes = np.array(mags, dtype=np.float32)
+    return {
+        'name': names,
+        'type': types,
+        'ra_hours': np.array(ra, dtype=np.float64),
+        'dec_degrees': np.array(dec, dtype=np.float64),
+        'magnitude': magnitudes,
+        'sort_magnitude': np.nan_to_num(magnitudes, nan=99.0).tolist(),
+        'body': bodies,
+        'keys': [key for key, _, _ in aliases],
+        'ids': [oid for _, oid, _ in aliases],
+        'fuzzy_buckets': {length: (keys, np.array(oids), _char_histograms(keys))
+                          for length, (keys, oids) in fuzzy_buckets.items()},
+        'hip': hip_to_id,
+    }
+
+
+def get_name_index():
+    """Returns the name index, building it on first use."""
+    global _NAME_INDEX
+    if _NAME_INDEX is None:
+        _NAME_INDEX = load_name_index()
+    return _NAME_INDEX
+
+
+def _record(index, oid, matched):
+    magnitude = float(index['magnitude'][oid])
+    return {
+        'id': oid,
+        'name': index['name'][oid],
+        'type': index['type'][oid],
+        'matched': matched,
+        'magnitude': None if magnitude != magnitude else round(magnitude, 2),
+    }
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """Edit distance between a and b, or max_distance + 1 once it must exceed it."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def prefix_search(query, limit=10, index=None):
+    """Objects with an alias starting with `query`, exact and bright matches first."""
+    index = index or get_name_index()
+    prefix = normalize_name(query)
+    if not prefix:
+        return []
+    keys, ids = index['keys'], index['ids']
+    lo = bisect_left(keys, prefix)
+    hi = min(bisect_left(keys, prefix + "\uffff"), lo + PREFIX_SCAN_LIMIT)
+    best = {}
+    for pos in range(lo, hi):
+        oid = ids[pos]
+        rank = (keys[pos] != prefix, len(keys[pos]), index['sort_magnitude'][oid])
+        if oid not in best or rank < best[oid][0]:
+            best[oid] = (rank, keys[pos])
+    ranked = sorted(best.items(), key=lambda item: item[1][0])[:limit]
+    return [_record(index, oid, key) for oid, (_, key) in ranked]
+
+
+def fuzzy_search(query, max_distance=FUZZY_MAX_DISTANCE, limit=10, index=None):
+    """Objects whose name is within `max_distance` edits of `query` ('Vgea' -> Vega)."""
+    index = index or get_name_index()
+    key = normalize_name(query)
+    if not key:
+        return []
+    # Each edit changes at most two character counts, so half the histogram
+    # distance is a lower bound that rejects nearly every key without the DP.
+    query_histogram = _char_histograms([key])[0]
+    best = {}
+    for length in range(max(1, len(key) - max_distance), len(key) + max_distance + 1):
+        if length not in index['fuzzy_buckets']:
+            continue
+        keys, oids, histograms = index['fuzzy_buckets'][length]
+        bound = np.abs(histograms - query_histogram).sum(axis=1)
+        for pos in np.flatnonzero(bound <= 2 * max_distance):
+            distance = bounded_levenshtein(key, keys[pos], max_distance)
+            oid = int(oids[pos])
+            if distance <= max_distance and (oid not in best or distance < best[oid][0]):
+                best[oid] = (distance, keys[pos])
+    ranked = sorted(best.items(), key=lambda item: (item[1][0], index['sort_magnitude'][item[0]]))
+    return [_record(index, oid, candidate) for oid, (_, candidate) in ranked[:limit]]
+
+
+def search_names(query, limit=10):
+    """Prefix matches for `query`, falling back to typo-tolerant matches."""
+    return prefix_search(query, limit) or fuzzy_search(query, limit=limit)
+
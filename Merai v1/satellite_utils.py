@@ -0,0 +1,251 @@
+# satellite_utils.py
+import os
+
+import numpy as np
+
+from table_utils import ObjectTable
+from visibility_utils import visibility_mask
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local TLE file (e.g. a CelesTrak "visual" or "starlink" group saved as text)
+TLE_PATH = os.path.join(_CURRENT_DIR, "satellites.tle")
+
+# Satellites propagated together; bounds memory to batch x times x 3 floats
+SATELLITE_BATCH_SIZE = 1000
+SATELLITE_MIN_ALTITUDE = 10.0
+MAX_VISIBLE_SATELLITES = 50
+# Observer must be at least in civil twilight to see a sunlit satellite
+SATELLITE_SUN_ALTITUDE_LIMIT = -6.0
+
+EARTH_RADIUS_KM = 6378.137
+_DAY_S = 86400.0
+
+_SATELLITES = None
+
+
+def load_satellites(file_path=TLE_PATH, batch_size=SATELLITE_BATCH_SIZE):
+    """Parses a local TLE file into names plus batched SGP4 satellite arrays.
+
+    Returns a dict with 'names' (object array), 'satellites' (list of
+    Skyfield EarthSatellite) and 'batches' (list of (start, SatrecArray)).
+    Returns an empty set if the file is missing.
+    """
+    from skyfield.api import load
+    from skyfield.iokit import parse_tle_file
+
+    satellites = []
+    try:
+        with open(file_path, 'rb') as f:
+            satellites = list(parse_tle_file(f, load.timescale()))
+    except FileNotFoundError:
+        print(f"Note: No TLE file found at {file_path}; satellites disabled.")
+    except Exception as e:
+        print(f"An unexpected error occurred while reading {file_path}: {e}")
+
+    names = np.array([sat.name or f"NORAD {sat.model.satnum}" for sat in satellites], dtype=object)
+    return _satellite_set(names, satellites, batch_size)
+
+
+def _satellite_set(names, satellites, batch_size=SATELLITE_BATCH_SIZE):
+    """Groups satellites into SatrecArray batches for vectorized SGP4."""
+    from sgp4.api import SatrecArray
+
+    batches = []
+    for start in range(0, len(satellites), batch_size):
+        chunk = satellites[start:start + batch_size]
+        batches.append((start, SatrecArray([sat.model for sat in chunk])))
+    return {'names': names, 'satellites': satellites, 'batches': batches}
+
+
+def get_satellites():
+    """Returns the satellite set from TLE_PATH, loading it on first use."""
+    global _SATELLITES
+    if _SATELLITES is None:
+        _SATELLITES = load_satellites()
+    return _SATELLITES
+
+
+def _observer_frame(lat, lon, elevation_m=0.0):
+    """Observer ITRS position (km) and its east/north/up unit vectors."""
+    from skyfield.api import wgs84
+
+    position = wgs84.latlon(lat, lon, elevation_m).itrs_xyz.km
+    phi, lam = np.radians(lat), np.radians(lon)
+    east = np.array([-np.sin(lam), np.cos(lam), 0.0])
+    north = np.array([-np.sin(phi) * np.cos(lam), -np.sin(phi) * np.sin(lam), np.cos(phi)])
+    up = np.array([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+    return position, east, north, up
+
+
+def _sun_itrs_unit(t, planets):
+    """Unit vector(s) toward the Sun in the Earth-fixed frame, shape (3,) or (3, n)."""
+    from skyfield.framelib import itrs
+
+    sun = planets['earth'].at(t).observe(planets['sun']).frame_xyz(itrs).km
+    return sun / np.linalg.norm(sun, axis=0)
+
+
+def _propagate_batch(sat_array, t, frame, sun_unit):
+    """Alt/az, range and sunlit flag for one SatrecArray over all times in t.
+
+    Every result has shape (n_satellites, n_times). SGP4 runs once for the
+    whole batch; the TEME -> Earth-fixed rotation, topocentric vector and
+    Earth-shadow test are plain array operations.
+    """
+    from skyfield.sgp4lib import theta_GMST1982
+
+    jd = np.atleast_1d(t.whole)
+    fraction = np.atleast_1d(t.tai_fraction - t._leap_seconds() / _DAY_S)
+    error, r_teme, _ = sat_array.sgp4(jd, fraction)
+
+    # TEME -> pseudo Earth-fixed: rotate about z by GMST (polar motion ignored)
+    theta, _ = theta_GMST1982(jd, np.atleast_1d(t.ut1_fraction))
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    r = np.empty_like(r_teme)
+    r[..., 0] = cos_t * r_teme[..., 0] + sin_t * r_teme[..., 1]
+    r[..., 1] = -sin_t * r_teme[..., 0] + cos_t * r_teme[..., 1]
+    r[..., 2] = r_teme[..., 2]
+
+    position, east, north, up = frame
+    d = r - position
+    rng = np.linalg.norm(d, axis=-1)
+    alt = np.degrees(np.arcsin(np.clip((d @ up) / rng, -1.0, 1.0)))
+    az = np.degrees(np.arctan2(d @ east, d @ north)) % 360.0
+
+    # Cylindrical Earth shadow: lit if on the day side or outside the shadow cylinder
+    sun = np.atleast_2d(sun_unit.T)  # (n_times, 3)
+    along = np.einsum('stk,tk->st', r, sun)
+    perp = np.linalg.norm(r - along[..., None] * sun, axis=-1)
+    sunlit = (along > 0) | (perp > EARTH_RADIUS_KM)
+
+    bad = error != 0
+    alt[bad] = np.nan
+    return alt, az, rng, sunlit
+
+
+def get_satellite_positions(lat, lon, t, planets, satellite_set=None):
+    """Current alt/az (degrees), range (km) and sunlit flag for every satellite.
+
+    `t` is a scalar Skyfield Time. Returns a dict of arrays indexed like
+    satellite_set['names'].
+    """
+    if satellite_set is None:
+        satellite_set = get_satellites()
+    n = len(satellite_set['names'])
+    result = {
+        'altitude': np.full(n, np.nan), 'azimuth': np.full(n, np.nan),
+        'range_km': np.full(n, np.nan), 'sunlit': np.zeros(n, dtype=bool),
+    }
+    if n == 0:
+        return result
+    frame = _observer_frame(lat, lon)
+    sun_unit = _sun_itrs_unit(t, planets)
+    for start, sat_array in satellite_set['batches']:
+        alt, az, rng, sunlit = _propagate_batch(sat_array, t, frame, sun_unit)
+        stop = start + alt.shape[0]
+        result['altitude'][start:stop] = alt[:, 0]
+        result['azimuth'][start:stop] = az[:, 0]
+        result['range_km'][start:stop] = rng[:, 0]
+        result['sunlit'][start:stop] = sunlit[:, 0]
+    return result
+
+
+def get_visible_satellites(lat, lon, t, planets, min_altitude=SATELLITE_MIN_ALTITUDE,
+                           max_results=MAX_VISIBLE_SATELLITES, filters=None, conditions=None):
+    """ObjectTable of satellites a naked-eye observer could see right now, highest first.
+
+    A satellite counts as visible when it is above `min_altitude`, lit by
+    the Sun, the observer's own sky is at least in civil twilight, and it
+    passes the visibility filters.
+    """
+    from skyfield.api import wgs84
+
+    satellite_set = get_satellites()
+    if len(satellite_set['names']) == 0:
+        return ObjectTable()
+    observer = planets['earth'] + wgs84.latlon(lat, lon)
+    sun_alt, _, _ = observer.at(t).observe(planets['sun']).apparent().altaz()
+    if sun_alt.degrees > SATELLITE_SUN_ALTITUDE_LIMIT:
+        return ObjectTable()
+
+    positions = get_satellite_positions(lat, lon, t, planets, satellite_set)
+    with np.errstate(invalid='ignore'):
+        visible = (positions['altitude'] > min_altitude) & positions['sunlit']
+    visible &= visibility_mask(positions['altitude'], positions['azimuth'], None, filters, conditions)
+    indices = np.flatnonzero(visible)
+    indices = indices[np.argsort(-positions['altitude'][indices])][:max_results]
+    return ObjectTable(
+        name=satellite_set['names'][indices],
+        type='Satellite',
+        altitude=positions['altitude'][indices],
+        azimuth=positions['azimuth'][indices],
+        range_km=positions['range_km'][indices].round(1),
+    )
+
+
+def _crossing_time(t0, t1, a0, a1, threshold):
+    """Linear interpolation of when altitude crosses `threshold` between samples."""
+    frac = np.clip((threshold - a0) / (a1 - a0), 0.0, 1.0)
+    return t0 + frac * (t1 - t0)
+
+
+def find_passes(lat, lon, start_time, planets, hours=12.0, step_seconds=60.0,
+                min_altitude=SATELLITE_MIN_ALTITUDE, name_filter=None):
+    """Upcoming passes above `min_altitude` over the next `hours`.
+
+    Each batch of satellites is propagated over the whole time grid at once;
+    rise/set are found from sign changes of (altitude - min_altitude) and
+    refined by linear interpolation. `name_filter` is a case-insensitive
+    substring (e.g. "ISS", "STARLINK"). Returns dicts sorted by rise time;
+    times are Skyfield Time objects.
+    """
+    from skyfield.api import load
+
+    satellite_set = get_satellites()
+    names = satellite_set['names']
+    if len(names) == 0:
+        return []
+    if name_filter:
+        wanted = np.array([name_filter.upper() in str(name).upper() for name in names], dtype=bool)
+        if not wanted.any():
+            return []
+        indices = np.flatnonzero(wanted)
+        satellite_set = _satellite_set(names[indices], [satellite_set['satellites'][i] for i in indices])
+        names = satellite_set['names']
+
+    ts = load.timescale()
+    offsets = np.arange(0.0, hours * 3600.0 + step_seconds, step_seconds) / _DAY_S
+    tt = start_time.tt + offsets
+    times = ts.tt_jd(tt)
+    frame = _observer_frame(lat, lon)
+    sun_unit = _sun_itrs_unit(times, planets)
+
+    passes = []
+    for start, sat_array in satellite_set['batches']:
+        alt, az, _, sunlit = _propagate_batch(sat_array, times, frame, sun_unit)
+        above = np.nan_to_num(alt, nan=-90.0) >= min_altitude
+        # Pad with "below" so passes in progress at either end still get a rise and a set
+        padded = np.pad(above, ((0, 0), (1, 1)))
+        edges = np.diff(padded.astype(np.int8), axis=1)
+        rise_sat, rise_idx = np.nonzero(edges == 1)
+        set_sat, set_idx = np.nonzero(edges == -1)
+        # Edges come out row-major, so rises and sets pair up in order
+        for s, i0, i1 in zip(rise_sat, rise_idx, set_idx - 1):
+            window = alt[s, i0:i1 + 1]
+            peak = i0 + int(np.nanargmax(window))
+            rise_tt = tt[i0] if i0 == 0 else _crossing_time(tt[i0 - 1], tt[i0], alt[s, i0 - 1], alt[s, i0], min_altitude)
+            set_tt = tt[i1] if i1 == len(tt) - 1 else _crossing_time(tt[i1], tt[i1 + 1], alt[s, i1], alt[s, i1 + 1], min_altitude)
+            passes.append({
+                'name': names[start + s],
+                'rise_time': ts.tt_jd(rise_tt),
+                'culmination_time': times[peak],
+                'set_time': ts.tt_jd(set_tt),
+                'max_altitude': round(float(alt[s, peak]), 1),
+                'rise_azimuth': round(float(az[s, i0]), 1),
+                'set_azimuth': round(float(az[s, i1]), 1),
+                'sunlit_at_peak': bool(sunlit[s, peak]),
+            })
+    passes.sort(key=lambda p: p['rise_time'].tt)
+    return passes
+
@@ -0,0 +1,187 @@
+# shared_data_utils.py
+"""Catalog arrays shared by every worker process on a host.
+
+The first worker to need a catalog builds it and saves each column as a
+.npy file under SHARED_DATA_DIR. Every worker, including that first one,
+then opens the files with np.load(mmap_mode='r'), so the operating system
+keeps one copy of the pages for all processes.
+
+Each build goes in a directory named after a fingerprint of its source
+files. A build lock lets one worker do the work while the others wait
+for it. The finished directory is renamed into place in one step, so a
+reader never sees a partial build. When a source file changes, its
+fingerprint changes and the next worker to notice builds a new version.
+
+Build every catalog before starting the workers with:
+
+    python shared_data_utils.py
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Where shared catalog files live; one directory per catalog version
+SHARED_DATA_DIR = os.environ.get("MERAI_SHARED_DATA", os.path.join(_CURRENT_DIR, ".shared_data"))
+
+# How long a worker waits for another one's build, and when a lock whose owner
+# cannot be checked counts as abandoned (a build takes seconds, so well below the wait)
+LOCK_TIMEOUT_SECONDS = 300
+LOCK_STALE_SECONDS = 60
+LOCK_POLL_SECONDS = 0.1
+
+# Written with every build: the names of its columns, one per line
+MANIFEST_FILENAME = 'columns.txt'
+
+
+def source_fingerprint(*paths, version=1):
+    """Short hash of the paths' names, sizes and modification times."""
+    digest = hashlib.sha1(f"v{version}".encode())
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"{os.path.abspath(path)}:missing".encode())
+    return digest.hexdigest()[:16]
+
+
+def _lock_abandoned(lock_path):
+    """True if the worker holding the lock has died.
+
+    The lock file holds the owner's pid. Where it cannot be checked (not
+    POSIX, or the pid is not written yet), a lock older than
+    LOCK_STALE_SECONDS counts as abandoned. Raises OSError if the lock is gone.
+    """
+    with open(lock_path) as f:
+        owner = f.read().strip()
+    if owner.isdigit() and os.name == 'posix':  # os.kill(pid, 0) terminates the process on Windows
+        try:
+            os.kill(int(owner), 0)
+            return False
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False  # alive, run by another user
+    return time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS
+
+
+@contextmanager
+def _build_lock(lock_path):
+    """Exclusive lock shared across processes: a lock file created with O_EXCL.
+
+    Works the same on every platform. A lock left by a worker that died
+    mid-build is taken over (see _lock_abandoned).
+    """
+    deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if _lock_abandoned(lock_path):
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue  # released (or taken over) meanwhile
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lock_path}")
+            time.sleep(LOCK_POLL_SECONDS)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def _attach(directory):
+    """Read-only memory maps of every column listed in the build's manifest, or
+    None if the manifest or any column file is missing or damaged."""
+    arrays = {}
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME), encoding='utf-8') as f:
+            columns = f.read().split()
+        for column in columns:
+            path = os.path.join(directory, f"{column}.npy")
+            try:
+                arrays[column] = np.load(path, mmap_mode='r')
+            except ValueError:
+                arrays[column] = np.load(path)  # empty arrays cannot be mapped
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Error: shared catalog {directory} is unreadable: {e}")
+        return None
+    return arrays
+
+
+def _remove_other_versions(name, keep):
+    """Deletes older builds of `name`. Workers still mapping them keep their pages on
+    POSIX; where the OS refuses (Windows), the next publish tries again."""
+    for entry in os.listdir(SHARED_DATA_DIR):
+        if entry.startswith(f"{name}-") and entry != keep and not entry.endswith('.lock'):
+            shutil.rmtree(os.path.join(SHARED_DATA_DIR, entry), ignore_errors=True)
+
+
+def _remove_staging(name):
+    """Deletes half-written builds of `name` left by workers that died; call with the build lock held."""
+    for entry in os.listdir(SHARED_DATA_DIR):
+        if entry.startswith(f".{name}-"):
+            shutil.rmtree(os.path.join(SHARED_DATA_DIR, entry), ignore_errors=True)
+
+
+def open_shared_arrays(name, fingerprint, build):
+    """Columns of catalog `name` as read-only memory maps, building them once per host.
+
+    `build()` returns a dict of NumPy arrays (numeric or fixed-width string
+    columns; object arrays cannot be mapped) or None to skip sharing. Only
+    one process runs it per fingerprint; the rest wait and attach. A build
+    whose files turn out to be damaged is rebuilt. Returns None if `build`
+    did, or if SHARED_DATA_DIR cannot be written.
+    """
+    version = f"{name}-{fingerprint}"
+    directory = os.path.join(SHARED_DATA_DIR, version)
+    if os.path.isdir(directory):
+        arrays = _attach(directory)
+        if arrays is not None:
+            return arrays
+    try:
+        os.makedirs(SHARED_DATA_DIR, exist_ok=True)
+        with _build_lock(os.path.join(SHARED_DATA_DIR, f"{name}.lock")):
+            # Another worker may have finished (or repaired) the build while we waited
+            arrays = _attach(directory) if os.path.isdir(directory) else None
+            if arrays is None:
+                _remove_staging(name)
+                shutil.rmtree(directory, ignore_errors=True)
+                arrays = build()
+                if arrays is None:
+                    return None
+                staging = tempfile.mkdtemp(prefix=f".{version}-", dir=SHARED_DATA_DIR)
+                for column, values in arrays.items():
+                    np.save(os.path.join(staging, f"{column}.npy"), np.ascontiguousarray(values))
+                with open(os.path.join(staging, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+                    f.write("\n".join(arrays) + "\n")
+                os.rename(staging, directory)
+                _remove_other_versions(name, keep=version)
+                arrays = _attach(directory)
+    except (OSError, TimeoutError) as e:
+        print(f"Error: could not share catalog '{name}' through {SHARED_DATA_DIR}: {e}")
+        return None
+    return arrays
+
+
+if __name__ == '__main__':
+    from star_utils import get_star_catalog
+
+    start = time.perf_counter()
+    catalog = get_star_catalog()
+    print(f"Star catalog: {len(catalog)} stars in {SHARED_DATA_DIR} ({time.perf_counter() - start:.1f} s)")
@@ -1,76 +1,106 @@
-import plotly.graph_objects as go
+import io
+from datetime import datetime, timezone
+
 import numpy as np
-from datetime import datetime
+
+from cache_utils import LRUCache
+from table_utils import ObjectTable
+from visibility_utils import zoom_altitude_range
+
+# Star names drawn on the chart; fainter stars are still labelled on hover
+MAX_STAR_LABELS = 25
+
+# Marker styles per object type, shared by the Plotly and the static chart
+STYLES = {
+    'Star': {'symbol': 'star', 'color': 'white', 'size': 16, 'opacity': 1, 'label': 'Star'},
+    'Planet': {'symbol': 'circle', 'color': 'gold', 'size': 22, 'label': 'Planet'},
+    'Sun': {'symbol': 'circle', 'color': 'yellow', 'size': 32, 'label': 'Sun'},
+    'Moon': {'symbol': 'circle', 'color': 'lightgray', 'size': 28, 'label': 'Moon'},
+    'Deep Sky': {'symbol': 'diamond', 'color': 'cyan', 'size': 18, 'label': 'Deep Sky'},
+    'Satellite': {'symbol': 'x', 'color': 'lime', 'size': 10, 'label': 'Satellite'},
+    'Asteroid': {'symbol': 'circle', 'color': 'sandybrown', 'size': 9, 'label': 'Asteroid'},
+    'Comet': {'symbol': 'star-diamond', 'color': 'aquamarine', 'size': 14, 'label': 'Comet'},
+    'Other': {'symbol': 'circle-open', 'color': 'grey', 'size': 10, 'label': 'Other'}
+}
+OUTLINED_TYPES = ('Sun', 'Moon', 'Planet')
+
+# Plotly marker symbols as matplotlib markers
+MPL_MARKERS = {'star': '*', 'circle': 'o', 'diamond': 'D', 'x': 'x', 'star-diamond': 'd', 'circle-open': 'o'}
+
+# Static charts are cached by location, time, zoom and size rounded to these steps
+STATIC_CHART_LOCATION_STEP = 0.1    # degrees, about 11 km
+STATIC_CHART_TIME_STEP_SECONDS = 300  # the sky turns 1.25° in five minutes
+STATIC_CHART_ZOOM_STEP = 0.1
+STATIC_CHART_SIZE_STEP = 50         # pixels
+STATIC_CHART_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_STATIC_CHART_CACHE = LRUCache(STATIC_CHART_CACHE_MAX_BYTES, sizeof=len)  # key -> image bytes
+
+def _chart_layers(objects):
+    """(type, style, altitudes, azimuths, names, labels, marker sizes) per object type above the horizon."""
+    objects = ObjectTable.from_records(objects)
+    altitudes = objects['altitude'].astype(float)
+    azimuths = objects['azimuth'].astype(float)
+    names = objects['name']
+    types = np.where(np.equal(objects['type'], None), 'Other', objects['type'])
+    for obj_type in dict.fromkeys(types):
+        style = STYLES.get(obj_type, STYLES['Other'])
+        shown = (types == obj_type) & (altitudes >= 0)
+        if not shown.any(): continue
+        object_names = names[shown]
+        marker_size = np.full(shown.sum(), float(style['size']))
+        labels = object_names
+        if obj_type == 'Star' and 'magnitude' in objects:
+            # Level-of-detail charts can hold hundreds of stars: size them by
+            # brightness and only label the brightest
+            magnitudes = np.nan_to_num(objects['magnitude'][shown].astype(float), nan=6.0)
+            marker_size = np.clip(style['size'] - 2.0 * magnitudes, 3, style['size'] + 4)
+            label_rank = np.argsort(np.argsort(magnitudes, kind='stable'), kind='stable')
+            labels = np.where(label_rank < MAX_STAR_LABELS, object_names, '')
+        yield obj_type, style, altitudes[shown], azimuths[shown], object_names, labels, marker_size
+
+def _chart_title(observer_lat, observer_lon, dt_utc):
+    local_time_str = dt_utc.astimezone().strftime("%Y-%m-%d %H:%M:%S %Z")
+    return f"Sky Chart for Lat: {observer_lat:.2f}, Lon: {observer_lon:.2f}", f"At {local_time_str}"
 
 def create_sky_chart(objects, observer_lat, observer_lon, dt_utc, zoom=1.0):
     """
     Generates an interactive sky chart of visible objects using Plotly.
+    `objects` is an ObjectTable (or a list of dicts, which is converted).
     Returns a Plotly Figure object.
     """
-    if not objects:
+    if objects is None or len(objects) == 0:
         return None
 
+    import plotly.graph_objects as go  # deferred until a chart is actually drawn
+
     try:
         fig = go.Figure()
-        # Define styles for different object types
-        styles = {
-            'Star': {'symbol': 'star', 'color': 'white', 'size': 16, 'opacity': 1, 'label': 'Star'},
-            'Planet': {'symbol': 'circle', 'color': 'gold', 'size': 22, 'label': 'Planet'},
-            'Sun': {'symbol': 'circle', 'color': 'yellow', 'size': 32, 'label': 'Sun'},
-            'Moon': {'symbol': 'circle', 'color': 'lightgray', 'size': 28, 'label': 'Moon'},
-            'Deep Sky': {'symbol': 'diamond', 'color': 'cyan', 'size': 18, 'label': 'Deep Sky'},
-            'Other': {'symbol': 'circle-open', 'color': 'grey', 'size': 10, 'label': 'Other'}
-        }
-        objects_by_type = {}
-        for obj in objects:
-            obj_type = obj.get('type', 'Other')
-            if obj_type not in objects_by_type:
-                objects_by_type[obj_type] = []
-            objects_by_type[obj_type].append(obj)
-        for obj_type, type_objects in objects_by_type.items():
-            if not type_objects: continue
-            style = styles.get(obj_type, styles['Other'])
-            azimuths_deg = []
-            altitudes_deg = []
-            object_names = []
-            hover_texts = []
-            for obj in type_objects:
-                az = obj.get('azimuth')
-                alt = obj.get('altitude')
-                if az is None or alt is None or alt < 0:
-                    continue
-                azimuths_deg.append(az)
-                altitudes_deg.append(alt)
-                object_names.append(obj.get('name', 'Unknown'))
-                hover_texts.append(f"{obj.get('name', 'Unknown')}<br>Alt: {alt:.1f}°<br>Az: {az:.1f}°")
-            if not azimuths_deg: continue
+        for obj_type, style, altitudes_deg, azimuths_deg, object_names, labels, marker_size in _chart_layers(objects):
+            hover_texts = [f"{name}<br>Alt: {alt:.1f}°<br>Az: {az:.1f}°"
+                           for name, alt, az in zip(object_names, altitudes_deg, azimuths_deg)]
             fig.add_trace(go.Scatterpolar(
                 r=altitudes_deg,
                 theta=azimuths_deg,
                 mode='markers+text',
                 name=style['label'],
-                text=object_names,
+                text=labels,
                 textfont=dict(size=13, color='skyblue', family="Arial Black"),
                 textposition="bottom center",
                 marker=dict(
                     symbol=style['symbol'],
                     color=style['color'],
-                    size=style['size'],
+                    size=marker_size,
                     opacity=style.get('opacity', 1.0),
-                    line=dict(width=1.5, color='black') if obj_type in ['Sun', 'Moon', 'Planet'] else None
+                    line=dict(width=1.5, color='black') if obj_type in OUTLINED_TYPES else None
                 ),
                 hoverinfo='text',
                 hovertext=hover_texts,
                 subplot='polar'
             ))
-        local_time_str = dt_utc.astimezone().strftime("%Y-%m-%d %H:%M:%S %Z")
-        title_text = f"Sky Chart for Lat: {observer_lat:.2f}, Lon: {observer_lon:.2f}<br>At {local_time_str}"
+        title_text = "<br>".join(_chart_title(observer_lat, observer_lon, dt_utc))
         # Calculate zoomed range
-        min_r, max_r = 0, 90
-        r_center = 45
-        r_span = (max_r - min_r) / zoom
-        r_min = max(r_center - r_span/2, 0)
-        r_max = min(r_center + r_span/2, 90)
+        r_min, r_max = zoom_altitude_range(zoom)
         fig.update_layout(
             title=dict(text=title_text, font=dict(size=20, color='gold'), y=0.98, x=0.5, xanchor='center', yanchor='top'),
             showlegend=True,
@@ -111,6 +141,103 @@ def create_sky_chart(objects, observer_lat, observer_lon, dt_utc, zoom=1.0):
         print(f"Error creating Plotly sky chart: {e}")
         return None
 
+def render_static_sky_chart(objects, observer_lat, observer_lon, dt_utc, zoom=1.0, size_px=800, fmt='png'):
+    """
+    Draws the sky chart with matplotlib and returns the image bytes ('png' or 'svg').
+    Same layout and styling as create_sky_chart, without the interactive payload.
+    Returns None if there is nothing to draw or rendering fails.
+    """
+    if objects is None or len(objects) == 0:
+        return None
+
+    from matplotlib.figure import Figure  # deferred; a Figure needs no pyplot state, so threads are safe
+
+    try:
+        dpi = 100
+        fig = Figure(figsize=(size_px / dpi, size_px / dpi), dpi=dpi, facecolor='#0f2027')
+        ax = fig.add_axes([0.08, 0.06, 0.64, 0.78], projection='polar', facecolor='#050A0E')
+        r_min, r_max = zoom_altitude_range(zoom)
+        for obj_type, style, altitudes_deg, azimuths_deg, object_names, labels, marker_size in _chart_layers(objects):
+            in_view = (altitudes_deg >= r_min) & (altitudes_deg <= r_max)  # polar axes would fold the rest inwards
+            if not in_view.any(): continue
+            altitudes_deg, azimuths_deg, labels, marker_size = (
+                altitudes_deg[in_view], azimuths_deg[in_view], labels[in_view], marker_size[in_view])
+            marker = MPL_MARKERS.get(style['symbol'], 'o')
+            hollow = style['symbol'].endswith('-open')
+            outlined = obj_type in OUTLINED_TYPES
+            theta = np.radians(azimuths_deg)
+            ax.scatter(theta, altitudes_deg, s=(0.75 * marker_size) ** 2, marker=marker, label=style['label'],
+                       c='none' if hollow else style['color'], edgecolors=style['color'] if hollow else ('black' if outlined else None),
+                       linewidths=1.5 if outlined or hollow else 0, alpha=style.get('opacity', 1.0), zorder=3)
+            for label, t, r in zip(labels, theta, altitudes_deg):
+                if label:
+                    ax.annotate(label, (t, r), xytext=(0, -9), textcoords='offset points', ha='center', va='top',
+                                color='skyblue', fontsize=8, fontweight='bold', annotation_clip=True, zorder=4)
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)  # clockwise, like the Plotly chart
+        ax.set_rticks(np.arange(0, 91, 15))
+        ax.set_yticklabels([f"{alt}°" for alt in np.arange(0, 91, 15)], color='white', fontsize=9)
+        ax.set_rlabel_position(90)
+        ax.set_rlim(r_min, r_max)
+        ax.set_xticks(np.radians(np.arange(0, 360, 45)))
+        ax.set_xticklabels(['N (0°)', 'NE (45°)', 'E (90°)', 'SE (135°)', 'S (180°)', 'SW (225°)', 'W (270°)', 'NW (315°)'],
+                           color='white', fontsize=9)
+        ax.grid(color='#303040')
+        ax.spines['polar'].set_color('lightgrey')
+        fig.suptitle("\n".join(_chart_title(observer_lat, observer_lon, dt_utc)), color='gold', fontsize=13)
+        legend = ax.legend(loc='center left', bbox_to_anchor=(1.1, 0.5), facecolor=(44 / 255, 83 / 255, 100 / 255, 0.9),
+                           edgecolor='gold', labelcolor='white', fontsize=10, markerscale=0.6)
+        legend.get_frame().set_linewidth(2)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, facecolor=fig.get_facecolor())
+        return buffer.getvalue()
+    except Exception as e:
+        print(f"Error rendering static sky chart: {e}")
+        return None
+
+def _options_key(options):
+    """Hashable form of get_visible_objects keyword arguments (filters may hold arrays)."""
+    items = []
+    for name, value in sorted(options.items()):
+        if isinstance(value, dict):
+            value = _options_key(value)
+        elif isinstance(value, np.ndarray):
+            value = value.tobytes()
+        items.append((name, value))
+    return tuple(items)
+
+def static_chart_key(observer_lat, observer_lon, dt_utc, zoom=1.0, size_px=800, fmt='png'):
+    """Quantized (lat, lon, time, zoom, size, format); charts with equal keys are drawn identically."""
+    step = STATIC_CHART_LOCATION_STEP
+    bucket = int(dt_utc.timestamp() // STATIC_CHART_TIME_STEP_SECONDS) * STATIC_CHART_TIME_STEP_SECONDS
+    return (round(round(observer_lat / step) * step, 6), round(round(observer_lon / step) * step, 6),
+            datetime.fromtimestamp(bucket, tz=timezone.utc),
+            round(round(zoom / STATIC_CHART_ZOOM_STEP) * STATIC_CHART_ZOOM_STEP, 6),
+            max(STATIC_CHART_SIZE_STEP, int(round(size_px / STATIC_CHART_SIZE_STEP)) * STATIC_CHART_SIZE_STEP),
+            fmt)
+
+def get_static_sky_chart(observer_lat, observer_lon, dt_utc, zoom=1.0, size_px=800, fmt='png', **visible_options):
+    """
+    Static sky chart bytes for a location and time, served from the render cache when possible.
+    Location, time, zoom and size are rounded (see static_chart_key) and the chart is computed
+    for the rounded values, so every request in a bucket gets the same image. Extra keyword
+    arguments (filters, dso_mag_limit, ...) go to get_visible_objects and are part of the key.
+    The cache holds at most STATIC_CHART_CACHE_MAX_BYTES, evicting the least recently used chart.
+    """
+    key = static_chart_key(observer_lat, observer_lon, dt_utc, zoom, size_px, fmt) + (_options_key(visible_options),)
+    image = _STATIC_CHART_CACHE.get(key)
+    if image is not None:
+        return image
+
+    from astro_utils import get_visible_objects  # astro_utils pulls in the catalogs
+
+    lat_q, lon_q, when, zoom_q, size_q, fmt = key[:6]
+    objects = get_visible_objects(lat_q, lon_q, when, zoom=zoom_q, **visible_options)
+    image = render_static_sky_chart(objects, lat_q, lon_q, when, zoom_q, size_q, fmt)
+    if image is not None:
+        _STATIC_CHART_CACHE.put(key, image)
+    return image
+
 if __name__ == '__main__':
     # Example Usage (for testing skychart_utils.py directly)
     print("Testing Plotly Sky Chart Generation...")
@@ -136,7 +263,6 @@ if __name__ == '__main__':
         from skyfield.api import utc
         mock_dt = datetime.utcnow().replace(tzinfo=utc)
     except ImportError:
-        from datetime import timezone
         mock_dt = datetime.utcnow().replace(tzinfo=timezone.utc) # Fallback if skyfield not in test path
 
     sky_chart_fig = create_sky_chart(mock_objects, mock_lat, mock_lon, mock_dt)
@@ -0,0 +1,181 @@
+# star_utils.py
+import os
+import time
+
+import numpy as np
+
+from constellation_utils import CONSTELLATION_FILE_PATH, get_constellation_map
+from name_utils import get_name_index
+from shared_data_utils import open_shared_arrays, source_fingerprint
+from visibility_utils import zoom_altitude_range
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local Hipparcos main catalog (hip_main.dat from CDS)
+HIPP_PATH = os.path.join(_CURRENT_DIR, "hip_main.dat")
+
+# Stars drawn per sky-chart render; zooming in spends it on fainter stars
+STAR_POINT_BUDGET = 300
+
+# Bump when the shared column layout changes, so old builds are not attached
+STAR_CATALOG_FORMAT = 1
+# How often a worker checks whether the source files changed
+STAR_CATALOG_REFRESH_SECONDS = 60
+
+_STAR_CATALOG = None
+_STAR_CATALOG_SOURCE = None
+_STAR_CATALOG_CHECKED = 0.0
+
+
+class StarCatalog:
+    """Hipparcos positions joined with HYG names and constellations, indexed by HIP id.
+
+    Columns are parallel NumPy arrays sorted by magnitude (brightest first,
+    unknown magnitudes last), so the brightest K stars are the slice [:K].
+    A dense HIP -> row table makes lookups plain array indexing, for one id
+    or many at once.
+    """
+    __slots__ = ('hip', 'ra_hours', 'dec_degrees', 'magnitude', 'name', 'constellation', '_row_of_hip')
+
+    def __init__(self, hip_path=HIPP_PATH):
+        from skyfield.data import hipparcos
+
+        try:
+            with open(hip_path, 'rb') as f:
+                stars = hipparcos.load_dataframe(f)
+            stars = stars.dropna(subset=['ra_hours', 'dec_degrees'])
+            stars = stars.sort_values('magnitude', kind='stable', na_position='last')
+        except FileNotFoundError:
+            print(f"Error: Hipparcos catalog not found at {hip_path}")
+            stars = None
+
+        if stars is None or len(stars) == 0:
+            self.hip = np.zeros(0, dtype=np.int64)
+            self.ra_hours = self.dec_degrees = self.magnitude = np.zeros(0)
+        else:
+            self.hip = stars.index.to_numpy(dtype=np.int64)
+            self.ra_hours = stars['ra_hours'].to_numpy(dtype=np.float64)
+            self.dec_degrees = stars['dec_degrees'].to_numpy(dtype=np.float64)
+            self.magnitude = stars['magnitude'].to_numpy(dtype=np.float64)
+
+        self._row_of_hip = np.full(int(self.hip.max(initial=0)) + 1, -1, dtype=np.int64)
+        self._row_of_hip[self.hip] = np.arange(len(self.hip))
+
+        # Names (proper, else Bayer/Flamsteed) and constellations come from HYG
+        self.name = np.full(len(self.hip), None, dtype=object)
+        self.constellation = np.full(len(self.hip), None, dtype=object)
+        index = get_name_index()
+        for hip, oid in index['hip'].items():
+            row = self.row_index(hip)
+            if row >= 0 and index['name'][oid] != f"HIP {hip}":
+                self.name[row] = index['name'][oid]
+        for hip, constellation in get_constellation_map().items():
+            row = self.row_index(hip)
+            if row >= 0:
+                self.constellation[row] = constellation
+
+    def to_arrays(self):
+        """Columns in a form that can be memory-mapped.
+
+        Object arrays cannot be mapped. Names, which few stars have, become
+        (rows, fixed-width strings) pairs; constellations become codes into
+        the list of constellation names (-1 where unknown).
+        """
+        named = np.flatnonzero(~np.equal(self.name, None))
+        known = ~np.equal(self.constellation, None)
+        constellation_names, codes = np.unique(self.constellation[known].astype(str), return_inverse=True)
+        constellation_codes = np.full(len(self.hip), -1, dtype=np.int16)
+        constellation_codes[known] = codes
+        return {'hip': self.hip, 'ra_hours': self.ra_hours, 'dec_degrees': self.dec_degrees,
+                'magnitude': self.magnitude, 'row_of_hip': self._row_of_hip,
+                'name_rows': named, 'name_values': self.name[named].astype(str),
+                'constellation_codes': constellation_codes, 'constellation_names': constellation_names}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Catalog over arrays from to_arrays() (e.g. read-only memory maps)."""
+        catalog = cls.__new__(cls)
+        for column in ('hip', 'ra_hours', 'dec_degrees', 'magnitude'):
+            setattr(catalog, column, arrays[column])
+        catalog._row_of_hip = arrays['row_of_hip']
+        catalog.name = np.full(len(catalog.hip), None, dtype=object)
+        catalog.name[arrays['name_rows']] = arrays['name_values'].tolist()
+        # Code -1 picks the trailing None; the 88 name strings are shared by every row
+        lookup = np.array(arrays['constellation_names'].tolist() + [None], dtype=object)
+        catalog.constellation = lookup[arrays['constellation_codes']]
+        return catalog
+
+    def __len__(self):
+        return len(self.hip)
+
+    def row_index(self, hip):
+        """Row of one HIP id, or -1 if the catalog does not have it."""
+        return int(self._row_of_hip[hip]) if 0 <= hip < len(self._row_of_hip) else -1
+
+    def count_brighter_than(self, magnitude):
+        """Number of stars brighter than `magnitude` (a binary search)."""
+        return int(np.searchsorted(self.magnitude, magnitude, side='left'))
+
+    def brighter_than(self, magnitude):
+        """Rows of stars brighter than `magnitude`, brightest first."""
+        return np.arange(self.count_brighter_than(magnitude))
+
+    def brightest(self, count):
+        """The `count` brightest stars as a row slice (columns sliced with it are views)."""
+        return slice(0, min(max(int(count), 0), len(self)))
+
+    def magnitude_limit(self, count):
+        """Magnitude of the faintest star among the `count` brightest."""
+        count = min(int(count), len(self))
+        return float(self.magnitude[count - 1]) if count > 0 else float('-inf')
+
+    def level_of_detail(self, zoom=1.0, point_budget=STAR_POINT_BUDGET):
+        """How many of the brightest stars to compute for a chart at `zoom`.
+
+        About `point_budget` stars should land in the altitude band the chart
+        shows. Stars are spread roughly evenly over the sphere, so that takes
+        point_budget / (fraction of the sphere in the band) of the brightest.
+        Zooming in narrows the band and so reaches fainter stars, while the
+        work per render stays bounded by the budget.
+        """
+        low, high = zoom_altitude_range(zoom)
+        sky_fraction = (np.sin(np.radians(high)) - np.sin(np.radians(low))) / 2.0
+        return min(len(self), int(np.ceil(point_budget / max(sky_fraction, 1e-3))))
+
+
+def load_star_catalog(hip_path=HIPP_PATH, fingerprint=None):
+    """StarCatalog attached to this host's shared copy, building that copy if needed.
+
+    Falls back to a private catalog when the shared copy cannot be used.
+    """
+    built = []
+
+    def build():
+        built.append(StarCatalog(hip_path))
+        return built[0].to_arrays() if len(built[0]) else None
+
+    fingerprint = fingerprint or source_fingerprint(hip_path, CONSTELLATION_FILE_PATH, version=STAR_CATALOG_FORMAT)
+    arrays = open_shared_arrays('star_catalog', fingerprint, build)
+    if arrays is not None:
+        try:
+            return StarCatalog.from_arrays(arrays)
+        except KeyError as e:
+            print(f"Error: shared star catalog has no column {e}; using a private copy")
+    return built[0] if built else StarCatalog(hip_path)
+
+
+def get_star_catalog():
+    """Returns the StarCatalog, loading it on first use.
+
+    Every STAR_CATALOG_REFRESH_SECONDS the source files are fingerprinted
+    again, so a replaced hip_main.dat or HYG file reaches running workers.
+    """
+    global _STAR_CATALOG, _STAR_CATALOG_SOURCE, _STAR_CATALOG_CHECKED
+    now = time.monotonic()
+    if _STAR_CATALOG is None or now - _STAR_CATALOG_CHECKED >= STAR_CATALOG_REFRESH_SECONDS:
+        _STAR_CATALOG_CHECKED = now
+        fingerprint = source_fingerprint(HIPP_PATH, CONSTELLATION_FILE_PATH, version=STAR_CATALOG_FORMAT)
+        if fingerprint != _STAR_CATALOG_SOURCE:
+            _STAR_CATALOG = load_star_catalog(fingerprint=fingerprint)
+            _STAR_CATALOG_SOURCE = fingerprint
+    return _STAR_CATALOG
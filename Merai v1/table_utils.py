@@ -0,0 +1,141 @@
+# table_utils.py
+import csv
+import io
+
+import numpy as np
+
+# Columns every table has; everything else (hip_id, designation, range_km, ...) is optional
+CORE_COLUMNS = ('name', 'type', 'altitude', 'azimuth')
+
+# Fill value per dtype kind when a column is missing from part of a table
+_MISSING = {'f': np.nan, 'i': 0, 'u': 0, 'b': False, 'O': None}
+
+
+def _is_missing(value, kind='O'):
+    """True for None, NaN, and the fill value of integer and bool columns."""
+    if value is None or value != value:
+        return True
+    return kind in 'iub' and value == _MISSING[kind]
+
+
+class ObjectTable:
+    """Sky objects stored as parallel NumPy columns instead of one dict per object.
+
+    Columns share one length. Text columns are object arrays (so existing
+    strings are referenced, not copied); numeric columns are float or int
+    arrays. Indexing with a column name returns the column, indexing with a
+    mask or index array returns a new table of those rows. records() gives
+    the old list-of-dicts shape for code that still wants it.
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, columns=None, **kwargs):
+        columns = {**(columns or {}), **kwargs}
+        lengths = {len(values) for values in columns.values() if values is not None and not np.isscalar(values)}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        size = lengths.pop() if lengths else 0
+        self.columns = {}
+        for name in CORE_COLUMNS:
+            columns.setdefault(name, np.zeros(size, dtype=np.float64) if name in ('altitude', 'azimuth') else None)
+        for name, values in columns.items():
+            self.columns[name] = self._as_column(values, size)
+
+    @staticmethod
+    def _as_column(values, size):
+        if values is None or np.isscalar(values):
+            column = np.empty(size, dtype=object)
+            column[:] = values
+            return column
+        values = np.asarray(values) if not isinstance(values, np.ndarray) else values
+        if values.dtype.kind in 'US':
+            values = values.astype(object)
+        return values
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a table from a list of dicts (missing keys become missing values)."""
+        if isinstance(records, cls):
+            return records
+        names = []
+        for record in records:
+            names.extend(key for key in record if key not in names)
+        columns = {}
+        for key in names:
+            values = [record.get(key) for record in records]
+            if any(v is None or isinstance(v, str) for v in values):
+                columns[key] = np.array(values, dtype=object)
+            else:
+                columns[key] = np.array(values)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables):
+        """Stacks tables row-wise; columns absent from a table are filled as missing."""
+        tables = [table for table in tables if table is not None]
+        names = []
+        for table in tables:
+            names.extend(key for key in table.columns if key not in names)
+        columns = {}
+        for key in names:
+            parts = [table.columns[key] for table in tables if key in table.columns]
+            dtype = object if any(p.dtype.kind == 'O' for p in parts) else np.result_type(*parts)
+            fill = _MISSING.get(np.dtype(dtype).kind)
+            columns[key] = np.concatenate([
+                table.columns[key] if key in table.columns else np.full(len(table), fill, dtype=dtype)
+                for table in tables
+            ]).astype(dtype, copy=False)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns['name'])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return ObjectTable({name: values[key] for name, values in self.columns.items()})
+
+    def __setitem__(self, key, values):
+        self.columns[key] = self._as_column(values, len(self))
+
+    def get(self, key, default=None):
+        """Column `key`, or a column filled with `default` if the table has none."""
+        if key in self.columns:
+            return self.columns[key]
+        return self._as_column(default, len(self))
+
+    def row(self, i):
+        """One object as a dict, leaving out missing optional values."""
+        record = {}
+        for name, values in self.columns.items():
+            value = values[i]
+            if isinstance(value, np.generic):
+                value = value.item()
+            if name in CORE_COLUMNS or not _is_missing(value, values.dtype.kind):
+                record[name] = value
+        return record
+
+    def records(self):
+        """List-of-dicts view, in the shape get_visible_objects used to return."""
+        return [self.row(i) for i in range(len(self))]
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def to_csv(self, columns=None):
+        """CSV text of the table (all columns unless `columns` is given)."""
+        columns = list(columns or self.columns)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        writer.writerows(zip(*(
+            ['' if _is_missing(v, self.columns[name].dtype.kind) else v for v in self.columns[name].tolist()]
+            for name in columns
+        )))
+        return buffer.getvalue()
@@ -0,0 +1,35 @@
+# tile_utils.py
+import numpy as np
+
+from wiki_utils import fetch_summaries, get_object_description
+
+# Stars fainter than this are drawn on the sky chart but get no tile
+TILE_STAR_MAG_LIMIT = 2.0
+
+
+def select_tile_objects(visible_objects):
+    """The rows of a get_visible_objects() table that get a tile."""
+    magnitudes = visible_objects.get('magnitude', np.nan).astype(float)
+    faint_star = (visible_objects['type'] == 'Star') & (magnitudes >= TILE_STAR_MAG_LIMIT)
+    return visible_objects[~faint_star]
+
+
+def enhance_visible_objects(visible_objects):
+    """Adds the description, tile heading and constellation columns the tiles show."""
+    names = visible_objects['name']
+    is_star = visible_objects['type'] == 'Star'
+    is_dso = visible_objects['type'] == 'Deep Sky'
+    hip_ids = visible_objects.get('hip_id')
+    wiki_titles = visible_objects.get('wiki_title')
+    image_keys = np.where(np.equal(wiki_titles, None), names, wiki_titles)
+    lookup_keys = np.where(is_star & ~np.equal(hip_ids, None), hip_ids, image_keys)
+    # One batched query fills the cache for every description and tile image below
+    fetch_summaries([*lookup_keys, *image_keys])
+    visible_objects['fetched_description'] = np.array([get_object_description(key) for key in lookup_keys], dtype=object)
+
+    # Stars already carry their catalog name and constellation from the StarCatalog
+    visible_objects['name_extracted_from_description_for_tile_h1'] = np.where(is_star & (names != hip_ids), names, None)
+    constellations = visible_objects.get('constellation')
+    visible_objects['constellation'] = np.where(
+        is_star | is_dso, np.where(np.equal(constellations, None), "Unknown", constellations), "N/A")
+    return visible_objects
@@ -0,0 +1,134 @@
+# visibility_map_utils.py
+import numpy as np
+
+from astro_utils import index_target
+from cache_utils import LRUCache
+from ephemeris_utils import get_ephemeris, check_time_in_range
+
+# Grid of observers behind the overlay: 180 x 360 = 64,800 points. Rows are
+# evenly spaced in Web Mercator y, so the image lines up with the map's tiles.
+VISIBILITY_MAP_ROWS = 180
+VISIBILITY_MAP_COLUMNS = 360
+MERCATOR_LIMIT_DEGREES = 85.0511  # latitude where Web Mercator y reaches ±pi
+
+# Overlays are drawn for the start of each time bucket. The shaded area slides
+# west with the Earth's rotation, 1.25° of longitude (about one grid column) per bucket.
+VISIBILITY_MAP_TIME_STEP_SECONDS = 300
+VISIBILITY_MAP_CACHE_MAX_ENTRIES = 64
+
+# WGS84 ellipsoid
+WGS84_RADIUS_KM = 6378.137
+WGS84_E2 = 6.69437999014e-3
+
+# Altitude colour stops (degrees -> RGB); below the horizon is transparent
+ALTITUDE_COLOR_STOPS = (
+    (0.0, (255, 255, 178)),
+    (20.0, (254, 204, 92)),
+    (45.0, (253, 141, 60)),
+    (90.0, (227, 26, 28)),
+)
+OVERLAY_ALPHA = 150
+
+_OVERLAY_CACHE = LRUCache(VISIBILITY_MAP_CACHE_MAX_ENTRIES)  # (object id, bucket start) -> PNG data URL
+
+
+def mercator_grid(rows=VISIBILITY_MAP_ROWS, columns=VISIBILITY_MAP_COLUMNS):
+    """(latitudes, longitudes) of the grid cell centres; latitudes run north to south."""
+    y_max = np.pi
+    y = y_max - (np.arange(rows) + 0.5) * (2 * y_max / rows)
+    latitudes = np.degrees(np.arctan(np.sinh(y)))
+    longitudes = -180.0 + (np.arange(columns) + 0.5) * (360.0 / columns)
+    return latitudes, longitudes
+
+
+def altitude_grid(record, when, latitudes, longitudes):
+    """Altitude (degrees) of a name-index object for every observer on a lat/lon grid.
+
+    Skyfield computes the apparent geocentric position once, in the true
+    equator of date. Each observer then needs only array operations: a
+    position on the WGS84 ellipsoid rotated by the local sidereal angle,
+    and the object's direction from there. Subtracting the observer's
+    position keeps the Moon's parallax, which reaches a degree. Atmospheric
+    refraction is ignored. Returns shape (len(latitudes), len(longitudes)),
+    or None if the body is not in the ephemeris.
+    """
+    from skyfield.api import load
+
+    t = load.timescale().from_datetime(when)
+    planets = get_ephemeris()
+    check_time_in_range(planets, t)
+    target = index_target(record, planets)
+    if target is None:
+        return None
+    ra, dec, distance = planets['earth'].at(t).observe(target).apparent().radec(epoch='date')
+    ra_rad, dec_rad = ra.radians, dec.radians
+    target_km = distance.km * np.array([np.cos(dec_rad) * np.cos(ra_rad), np.cos(dec_rad) * np.sin(ra_rad), np.sin(dec_rad)])
+
+    phi = np.radians(np.asarray(latitudes, dtype=np.float64))[:, None]
+    theta = np.radians(t.gast * 15.0 + np.asarray(longitudes, dtype=np.float64))[None, :]
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    prime_vertical = WGS84_RADIUS_KM / np.sqrt(1.0 - WGS84_E2 * sin_phi ** 2)
+    dx = target_km[0] - prime_vertical * cos_phi * cos_theta
+    dy = target_km[1] - prime_vertical * cos_phi * sin_theta
+    dz = target_km[2] - prime_vertical * (1.0 - WGS84_E2) * sin_phi
+    # Component along the local vertical (the ellipsoid normal)
+    up = cos_phi * cos_theta * dx + cos_phi * sin_theta * dy + sin_phi * dz
+    return np.degrees(np.arcsin(np.clip(up / np.sqrt(dx ** 2 + dy ** 2 + dz ** 2), -1.0, 1.0)))
+
+
+def altitude_colors(altitudes):
+    """RGBA image (uint8) of an altitude grid: coloured by altitude, clear below the horizon."""
+    image = np.zeros(altitudes.shape + (4,), dtype=np.uint8)
+    stops = np.array([stop for stop, _ in ALTITUDE_COLOR_STOPS])
+    colors = np.array([color for _, color in ALTITUDE_COLOR_STOPS], dtype=np.float64)
+    for channel in range(3):
+        image[..., channel] = np.interp(altitudes, stops, colors[:, channel]).astype(np.uint8)
+    image[..., 3] = np.where(altitudes > 0, OVERLAY_ALPHA, 0)
+    return image
+
+
+def _time_bucket(when):
+    bucket = int(when.timestamp() // VISIBILITY_MAP_TIME_STEP_SECONDS) * VISIBILITY_MAP_TIME_STEP_SECONDS
+    return when.fromtimestamp(bucket, tz=when.tzinfo)
+
+
+def visibility_overlay_url(record, when):
+    """PNG data URL of where the object is above the horizon, or None if it has no position.
+
+    Cached per (object, time bucket). The image is computed for the start of
+    the bucket, so every request in a bucket gets the same overlay.
+    """
+    from folium.utilities import image_to_url
+
+    bucket = _time_bucket(when)
+    key = (record['id'], bucket)
+    url = _OVERLAY_CACHE.get(key)
+    if url is not None:
+        return url
+    latitudes, longitudes = mercator_grid()
+    altitudes = altitude_grid(record, bucket, latitudes, longitudes)
+    if altitudes is None:
+        return None
+    url = image_to_url(altitude_colors(altitudes), origin='upper')
+    _OVERLAY_CACHE.put(key, url)
+    return url
+
+
+def add_visibility_overlay(folium_map, record, when):
+    """Shades the folium map where the object is above the horizon at `when`.
+
+    Returns False if the object has no position in the loaded ephemeris.
+    """
+    import folium
+
+    url = visibility_overlay_url(record, when)
+    if url is None:
+        return False
+    folium.raster_layers.ImageOverlay(
+        image=url,
+        bounds=[[-MERCATOR_LIMIT_DEGREES, -180.0], [MERCATOR_LIMIT_DEGREES, 180.0]],
+        name=f"{record['name']} above the horizon",
+        pixelated=False,
+    ).add_to(folium_map)
+    return True
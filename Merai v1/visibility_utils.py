@@ -0,0 +1,106 @@
+# visibility_utils.py
+import numpy as np
+
+# Sun altitude limits for the twilight filter, in degrees
+TWILIGHT_LIMITS = {
+    "Civil": -6.0,
+    "Nautical": -12.0,
+    "Astronomical": -18.0,
+}
+
+# Every predicate is off (or the old "above the horizon" rule) unless set
+DEFAULT_FILTERS = {
+    'min_altitude': 0.0,          # degrees
+    'horizon_profile': None,      # 360 altitudes, one per degree of azimuth
+    'max_sun_altitude': None,     # degrees; e.g. TWILIGHT_LIMITS["Astronomical"]
+    'min_moon_separation': None,  # degrees
+    'max_magnitude': None,        # objects without a magnitude always pass
+}
+
+
+def make_filters(**settings):
+    """DEFAULT_FILTERS with the given settings applied; rejects unknown names."""
+    unknown = set(settings) - set(DEFAULT_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown visibility filter(s): {', '.join(sorted(unknown))}")
+    return {**DEFAULT_FILTERS, **settings}
+
+
+def parse_horizon_profile(text):
+    """Horizon profile from 'azimuth:altitude' points, e.g. '0:5, 90:20, 200:12'.
+
+    Points may be separated by commas or newlines. Altitudes are linearly
+    interpolated (wrapping through north) onto a 1-degree azimuth grid.
+    Returns None for empty input; raises ValueError on malformed points.
+    """
+    points = []
+    for chunk in text.replace("\n", ",").split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        try:
+            az, alt = (float(part) for part in chunk.split(":"))
+        except ValueError:
+            raise ValueError(f"Horizon point '{chunk}' is not in 'azimuth:altitude' form") from None
+        points.append((az % 360.0, alt))
+    if not points:
+        return None
+    points.sort()
+    az, alt = np.array(points).T
+    return np.interp(np.arange(360.0), az, alt, period=360.0)
+
+
+def horizon_altitude(profile, azimuth):
+    """Obstruction altitude at each azimuth (degrees), interpolated from the profile."""
+    return np.interp(np.asarray(azimuth, dtype=np.float64), np.arange(360.0), profile, period=360.0)
+
+
+def zoom_altitude_range(zoom=1.0):
+    """(lowest, highest) altitude in degrees shown by the sky chart at `zoom`.
+
+    The chart keeps the 45° circle centred and divides the 0-90° span by
+    the zoom factor.
+    """
+    span = 90.0 / zoom
+    return max(45.0 - span / 2, 0.0), min(45.0 + span / 2, 90.0)
+
+
+def angular_separation(alt1, az1, alt2, az2):
+    """Great-circle separation in degrees between alt/az directions (broadcasts)."""
+    alt1, az1, alt2, az2 = (np.radians(x) for x in (alt1, az1, alt2, az2))
+    cos_sep = np.sin(alt1) * np.sin(alt2) + np.cos(alt1) * np.cos(alt2) * np.cos(az1 - az2)
+    return np.degrees(np.arccos(np.clip(cos_sep, -1.0, 1.0)))
+
+
+def visibility_mask(altitude, azimuth, magnitude=None, filters=None, conditions=None, is_moon=None):
+    """Boolean mask of objects passing every active filter.
+
+    `altitude`, `azimuth` and `magnitude` are equal-length arrays (magnitude
+    may be None or contain NaN). `conditions` holds the scalars shared by
+    the whole sky: 'sun_altitude', 'moon_altitude' and 'moon_azimuth'.
+    `is_moon` marks rows exempt from the Moon-separation test.
+    """
+    filters = filters or DEFAULT_FILTERS
+    conditions = conditions or {}
+    altitude = np.asarray(altitude, dtype=np.float64)
+    azimuth = np.asarray(azimuth, dtype=np.float64)
+
+    with np.errstate(invalid='ignore'):
+        mask = altitude > filters['min_altitude']
+        if filters['horizon_profile'] is not None:
+            mask &= altitude > horizon_altitude(filters['horizon_profile'], azimuth)
+        if filters['max_sun_altitude'] is not None and conditions.get('sun_altitude') is not None:
+            if conditions['sun_altitude'] > filters['max_sun_altitude']:
+                mask[:] = False
+        if filters['min_moon_separation'] and conditions.get('moon_altitude') is not None:
+            separation = angular_separation(altitude, azimuth, conditions['moon_altitude'], conditions['moon_azimuth'])
+            far_enough = separation >= filters['min_moon_separation']
+            if is_moon is not None:
+                far_enough |= is_moon
+            # Only a risen Moon washes out its neighbourhood
+            if conditions['moon_altitude'] > 0:
+                mask &= far_enough
+        if filters['max_magnitude'] is not None and magnitude is not None:
+            magnitude = np.asarray(magnitude, dtype=np.float64)
+            mask &= ~(magnitude > filters['max_magnitude'])
+    return mask
@@ -1,36 +1,279 @@
-import requests
 import html
+import random
 import re
-from bs4 import BeautifulSoup
+import threading
+import time
 
-def get_object_image_url(name):
-    url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{name}"
-    try:
-        resp = requests.get(url, timeout=5)
-        if resp.status_code == 200:
+# requests and BeautifulSoup are imported on first lookup to keep app start-up fast
+
+WIKI_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/{}"
+WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKI_TIMEOUT_SECONDS = 5.0
+WIKI_MAX_RETRIES = 2
+WIKI_BACKOFF_BASE_SECONDS = 0.25
+
+# Found summaries change rarely; missing articles are retried sooner
+WIKI_CACHE_TTL_SECONDS = 24 * 3600
+WIKI_NEGATIVE_TTL_SECONDS = 3600
+WIKI_CACHE_MAX_ENTRIES = 4096
+
+# Titles per action API query (the API's limit). Intro extracts come back 20
+# per response, so a full batch takes up to three continued requests.
+WIKI_BATCH_SIZE = 50
+WIKI_THUMBNAIL_SIZE = 320  # pixels, as in the REST summary thumbnails
+
+# After this many consecutive failed lookups, skip the network for the cooldown.
+# A lookup counts once however many retries it used (see _request).
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN_SECONDS = 60.0
+
+# Total time one page render may spend waiting on Wikipedia
+PAGE_LATENCY_BUDGET_SECONDS = 10.0
+
+_SUMMARY_CACHE = {}  # title -> (expires_at, summary dict, or None if there is no article)
+_CACHE_LOCK = threading.Lock()
+_BREAKER = {'failures': 0, 'open_until': 0.0}
+_BREAKER_LOCK = threading.Lock()
+_PAGE = threading.local()  # Streamlit runs each session's script in its own thread
+
+
+class WikiBackend:
+    """Where and how Wikipedia is reached.
+
+    `get` is a requests.get-compatible callable (None means requests.get).
+    Install another backend with set_wiki_backend(), e.g. to point the
+    lookups at a local stand-in server.
+    """
+    __slots__ = ('summary_url', 'api_url', 'get')
+
+    def __init__(self, summary_url=WIKI_SUMMARY_URL, api_url=WIKI_API_URL, get=None):
+        self.summary_url = summary_url
+        self.api_url = api_url
+        self.get = get
+
+    def request(self, url, params=None, timeout=WIKI_TIMEOUT_SECONDS):
+        if self.get is None:
+            import requests
+            return requests.get(url, params=params, timeout=timeout)
+        return self.get(url, params=params, timeout=timeout)
+
+
+_BACKEND = WikiBackend()
+
+
+def set_wiki_backend(backend):
+    """Routes every lookup through `backend`; returns the previous one so it can be restored."""
+    global _BACKEND
+    previous, _BACKEND = _BACKEND, backend
+    return previous
+
+
+def start_page_budget(seconds=PAGE_LATENCY_BUDGET_SECONDS):
+    """Starts the Wikipedia latency budget for the page being rendered by this thread."""
+    _PAGE.deadline = time.monotonic() + seconds
+
+
+def _remaining_budget():
+    deadline = getattr(_PAGE, 'deadline', None)
+    return float('inf') if deadline is None else deadline - time.monotonic()
+
+
+def circuit_open():
+    """True while the breaker is skipping the network after repeated failures."""
+    with _BREAKER_LOCK:
+        return time.monotonic() < _BREAKER['open_until']
+
+
+def _record_success():
+    with _BREAKER_LOCK:
+        _BREAKER['failures'] = 0
+        _BREAKER['open_until'] = 0.0
+
+
+def _record_failure():
+    with _BREAKER_LOCK:
+        _BREAKER['failures'] += 1
+        # Half-open after the cooldown: the failure count is not reset, so one more failure reopens
+        if _BREAKER['failures'] >= CIRCUIT_FAILURE_THRESHOLD:
+            if time.monotonic() >= _BREAKER['open_until']:
+                print(f"Wikipedia unreachable; skipping lookups for {CIRCUIT_COOLDOWN_SECONDS:.0f} s")
+            _BREAKER['open_until'] = time.monotonic() + CIRCUIT_COOLDOWN_SECONDS
+
+
+def _cache_get(title):
+    """(True, summary-or-None) for a fresh cache entry, else (False, None)."""
+    with _CACHE_LOCK:
+        entry = _SUMMARY_CACHE.get(title)
+        if entry and entry[0] > time.monotonic():
+            return True, entry[1]
+    return False, None
+
+
+def _cache_put(title, summary, ttl):
+    with _CACHE_LOCK:
+        _SUMMARY_CACHE.pop(title, None)
+        if len(_SUMMARY_CACHE) >= WIKI_CACHE_MAX_ENTRIES:
+            del _SUMMARY_CACHE[next(iter(_SUMMARY_CACHE))]  # oldest insertion
+        _SUMMARY_CACHE[title] = (time.monotonic() + ttl, summary)
+
+
+def _request(url, params=None, what="Wikipedia"):
+    """GET through the backend with jittered exponential backoff.
+
+    Returns the response for a 200 or a definite 4xx answer, or None when
+    the service is unavailable: errors after every retry, the circuit
+    breaker open, or the page's latency budget spent. A lookup that gives
+    up after errors is one failure for the circuit breaker.
+    """
+    error = None
+    for attempt in range(WIKI_MAX_RETRIES + 1):
+        remaining = _remaining_budget()
+        if circuit_open() or remaining <= 0:
+            break
+        try:
+            resp = _BACKEND.request(url, params=params, timeout=min(WIKI_TIMEOUT_SECONDS, remaining))
+        except Exception as e:  # requests errors, or anything an installed backend raises
+            error = e
+        else:
+            if resp.status_code == 200 or (400 <= resp.status_code < 500 and resp.status_code != 429):
+                _record_success()  # a 4xx means the service answered; the article just is not there
+                return resp
+            error = f"HTTP {resp.status_code}"
+        if attempt < WIKI_MAX_RETRIES:
+            delay = random.uniform(0, WIKI_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            if delay >= _remaining_budget():
+                break
+            time.sleep(delay)
+    if error is not None:
+        _record_failure()
+        print(f"Error fetching {what}: {error}")
+    return None
+
+
+def fetch_summary(title):
+    """The REST summary JSON for an article, or None.
+
+    Served from cache when fresh (including cached "no such article"
+    answers). Otherwise the request is retried with jittered exponential
+    backoff, but never while the circuit breaker is open or beyond the
+    page's remaining latency budget.
+    """
+    hit, summary = _cache_get(title)
+    if hit:
+        return summary
+    resp = _request(_BACKEND.summary_url.format(title), what=f"Wikipedia summary for {title}")
+    if resp is None:
+        return None
+    summary = None
+    if resp.status_code == 200:
+        try:
+            summary = resp.json()
+        except ValueError as e:  # e.g. a captive portal's HTML page
+            _record_failure()
+            print(f"Error reading Wikipedia summary for {title}: {e}")
+            return None
+    _cache_put(title, summary, WIKI_CACHE_TTL_SECONDS if summary else WIKI_NEGATIVE_TTL_SECONDS)
+    return summary
+
+
+def _query_pages(titles):
+    """{title: summary record or None} for up to WIKI_BATCH_SIZE titles via the action API.
+
+    Records carry the REST summary fields the app reads ('title',
+    'extract', 'thumbnail'). Follows the API's continuation and maps each
+    requested title through title normalization and redirects. Returns
+    None if the service is unavailable or answers with an error or an
+    unreadable body, so the caller caches nothing for the batch.
+    """
+    params = {
+        'action': 'query', 'format': 'json', 'formatversion': 2, 'redirects': 1,
+        'prop': 'extracts|pageimages', 'exintro': 1, 'explaintext': 1, 'exlimit': 'max',
+        'piprop': 'thumbnail', 'pithumbsize': WIKI_THUMBNAIL_SIZE, 'pilimit': 'max',
+        'titles': '|'.join(titles),
+    }
+    pages, aliases, continuation = {}, {}, {}
+    while True:
+        resp = _request(_BACKEND.api_url, {**params, **continuation}, what=f"Wikipedia batch of {len(titles)} titles")
+        if resp is None or resp.status_code != 200:
+            return None
+        try:
             data = resp.json()
-            if 'thumbnail' in data and 'source' in data['thumbnail']:
-                return data['thumbnail']['source']
-    except Exception:
-        pass
+            # An API error (e.g. badvalue, maxlag, readonly) is not an answer about the titles
+            error = data.get('error') or (None if 'query' in data or 'continue' in data else "no query result")
+        except (ValueError, AttributeError) as e:  # not JSON, or not a JSON object
+            error = e
+        if error:
+            _record_failure()
+            print(f"Error in Wikipedia batch of {len(titles)} titles: {error}")
+            return None
+        query = data.get('query', {})
+        for entry in query.get('normalized', []) + query.get('redirects', []):
+            aliases[entry['from']] = entry['to']
+        for page in query.get('pages', []):
+            if page.get('missing') or page.get('invalid'):
+                continue
+            record = pages.setdefault(page['title'], {'title': page['title']})
+            if page.get('extract'):
+                record['extract'] = page['extract']
+            if 'thumbnail' in page:
+                record['thumbnail'] = page['thumbnail']
+        if 'continue' not in data:
+            break
+        continuation = data['continue']
+
+    results = {}
+    for title in titles:
+        target, seen = title, {title}
+        while target in aliases and aliases[target] not in seen:
+            target = aliases[target]
+            seen.add(target)
+        results[title] = pages.get(target)
+    return results
+
+
+def fetch_summaries(titles):
+    """Summary records for many titles at once: {title: record or None}.
+
+    Cached titles are answered from the cache. The rest go to the action
+    API in batches of WIKI_BATCH_SIZE, and the answers, including missing
+    articles, are cached. After that, get_object_description() and
+    get_object_image_url() for these titles need no further requests.
+    """
+    results, pending = {}, []
+    for title in dict.fromkeys(titles):
+        hit, summary = _cache_get(title)
+        if hit:
+            results[title] = summary
+        elif '|' in title:
+            results[title] = fetch_summary(title)  # '|' separates titles in a batch
+        else:
+            pending.append(title)
+    for start in range(0, len(pending), WIKI_BATCH_SIZE):
+        batch = pending[start:start + WIKI_BATCH_SIZE]
+        pages = _query_pages(batch)
+        for title in batch:
+            summary = pages.get(title) if pages is not None else None
+            if pages is not None:
+                _cache_put(title, summary, WIKI_CACHE_TTL_SECONDS if summary else WIKI_NEGATIVE_TTL_SECONDS)
+            results[title] = summary
+    return results
+
+
+def get_object_image_url(name):
+    data = fetch_summary(name)
+    if data and 'thumbnail' in data and 'source' in data['thumbnail']:
+        return data['thumbnail']['source']
     return None
 
 def get_object_description(name):
-    url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{name}"
-    try:
-        resp = requests.get(url, timeout=5)
-        if resp.status_code == 200:
-            data = resp.json()
-            if 'extract' in data:
-                raw_description = html.unescape(data['extract'])
-                print(f"Raw description for {name}: {raw_description}")  # Debugging output
-                # Use BeautifulSoup to clean HTML
-                soup = BeautifulSoup(raw_description, "html.parser")
-                cleaned_description = soup.get_text(strip=True)
-                print(f"Cleaned description for {name}: {cleaned_description}")  # Debugging output
-                return cleaned_description
-    except Exception as e:
-        print(f"Error fetching description for {name}: {e}")  # Debugging output
+    from bs4 import BeautifulSoup
+
+    data = fetch_summary(name)
+    if data and 'extract' in data:
+        raw_description = html.unescape(data['extract'])
+        # Use BeautifulSoup to clean HTML
+        soup = BeautifulSoup(raw_description, "html.parser")
+        return soup.get_text(strip=True)
     return "Description not available."
 
 def extract_name_from_description(description: str) -> str | None: